@@ -25,17 +25,44 @@ from __future__ import annotations
 import argparse
 import csv
 import datetime as dt
+import functools
 import hashlib
-import json
+import itertools
+import math
 import os
 import re
 import sqlite3
+import stat
+import sys
+import threading
 import uuid
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
+from simage.utils import jsonio
 from simage.utils.paths import resolve_repo_path, resolve_repo_relative
 
 
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+_hash_buffers = threading.local()
+
+
+def _sha256_of_file(path: Any) -> str:
+    """
+    sha256 of a file read with readinto() into a reused per-thread 8 MiB buffer.
+    Unbuffered open skips the BufferedReader copy; update() releases the GIL.
+    """
+    view = getattr(_hash_buffers, "view", None)
+    if view is None:
+        view = _hash_buffers.view = memoryview(bytearray(HASH_CHUNK_SIZE))
+    h = hashlib.sha256()
+    with open(path, "rb", buffering=0) as f:
+        while n := f.readinto(view):
+            h.update(view[:n])
+    return h.hexdigest()
+
+
 def sha256_file_backup(path: str) -> Optional[str]:
     """
     Backup: Directly compute SHA256 for any file path, bypassing repo-relative logic.
@@ -46,11 +73,7 @@ def sha256_file_backup(path: str) -> Optional[str]:
         abs_path = Path(path)
         if not abs_path.exists():
             return None
-        h = hashlib.sha256()
-        with open(abs_path, "rb") as f:
-            for chunk in iter(lambda: f.read(1024 * 1024), b""):
-                h.update(chunk)
-        return h.hexdigest()
+        return _sha256_of_file(abs_path)
     except Exception:
         return None
 
@@ -80,54 +103,138 @@ def utc_now_iso() -> str:
     return dt.datetime.now(dt.UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
+STABLE_ID_NAMESPACE = uuid.UUID("12345678-1234-5678-1234-567812345678")
+
+
+# Bounded so repeated normalize_records calls in one process (tests, library
+# use) cannot grow it without limit; also cleared per call, since a relative
+# path resolves against the cwd, which may change between calls.
+@functools.lru_cache(maxsize=16384)
+def _resolve_repo_relative_cached(path: str) -> Tuple[str, str]:
+    rel, abs_path = resolve_repo_relative(path, allow_absolute=True)
+    return str(rel), str(abs_path)
+
+
+@functools.lru_cache(maxsize=16384)
+def _stable_id_for_rel(rel: str) -> str:
+    return str(uuid.uuid5(STABLE_ID_NAMESPACE, rel.lower()))
+
+
 def stable_id_for_path(path: str) -> str:
     # deterministic UUID from repo-relative path (so re-ingest doesn’t duplicate)
-    ns = uuid.UUID("12345678-1234-5678-1234-567812345678")
-    rel, _abs = resolve_repo_relative(path, allow_absolute=True)
-    return str(uuid.uuid5(ns, str(rel).lower()))
+    rel, _abs = _resolve_repo_relative_cached(path)
+    return _stable_id_for_rel(rel)
 
 
 def sha256_file(path: str) -> Optional[str]:
     try:
-        import os
         from pathlib import Path
         # If file is inside repo, use resolve_repo_relative; else, use absolute path directly
         if Path(path).is_absolute() and Path(path).exists():
             abs_path = path
         else:
             _rel, abs_path = resolve_repo_relative(path, allow_absolute=True)
-        h = hashlib.sha256()
-        with open(abs_path, "rb") as f:
-            for chunk in iter(lambda: f.read(1024 * 1024), b""):
-                h.update(chunk)
-        return h.hexdigest()
+        return _sha256_of_file(abs_path)
     except Exception:
         return None
 
 
+def prehash_paths(paths: Iterable[Optional[str]]) -> Dict[str, str]:
+    """
+    Compute sha256 for many files at once, keyed by path.
+    Hashing releases the GIL, so a thread pool scales with cores/disks.
+    """
+    unique = list(dict.fromkeys(p for p in paths if isinstance(p, str) and p and os.path.isfile(p)))
+    if not unique:
+        return {}
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+        digests = pool.map(sha256_file, unique)
+        return {p: d for p, d in zip(unique, digests) if d}
+
+
+def stat_paths(paths: Iterable[Optional[str]]) -> Dict[str, Tuple[int, int]]:
+    """Return {path: (size, mtime_ns)} for the paths that are regular files."""
+    out: Dict[str, Tuple[int, int]] = {}
+    for p in paths:
+        if not isinstance(p, str) or not p or p in out:
+            continue
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            out[p] = (st.st_size, st.st_mtime_ns)
+    return out
+
+
+def cached_digests(
+    pairs: Iterable[Tuple[str, Optional[str]]],
+    stats: Dict[str, Tuple[int, int]],
+    known: Dict[str, Tuple[int, int, str]],
+) -> Dict[str, str]:
+    """
+    Reuse stored sha256 values for files whose (size, mtime_ns) still match.
+
+    `pairs` are (repo-relative, absolute) source paths, `stats` comes from
+    stat_paths and `known` from load_file_fingerprints. Returns {abs_path: sha256}.
+    """
+    out: Dict[str, str] = {}
+    for rel, abs_path in pairs:
+        if not abs_path:
+            continue
+        st = stats.get(abs_path)
+        row = known.get(rel)
+        if st is not None and row is not None and st == row[:2]:
+            out[abs_path] = row[2]
+    return out
+
+
 def is_probably_json(s: str) -> bool:
-    s = s.strip()
-    return (s.startswith("{") and s.endswith("}")) or (s.startswith("[") and s.endswith("]"))
+    # Index scan from both ends instead of strip(): workflow blobs can be 100 KB+.
+    n = len(s)
+    i = 0
+    while i < n and s[i].isspace():
+        i += 1
+    if i == n:
+        return False
+    j = n - 1
+    while s[j].isspace():
+        j -= 1
+    first, last = s[i], s[j]
+    return (first == "{" and last == "}") or (first == "[" and last == "]")
 
 
 def safe_json_loads(s: str) -> Optional[Any]:
     try:
-        return json.loads(s)
+        return jsonio.loads(s)
     except Exception:
         return None
 
 
-def first_present(d: Dict[str, Any], keys: List[str]) -> Optional[Any]:
+def first_present(d: Dict[str, Any], keys: Iterable[str]) -> Optional[Any]:
+    get = d.get  # one hash per key instead of `in` + `[]`
     for k in keys:
-        if k in d and d[k] not in (None, ""):
-            return d[k]
+        v = get(k)
+        if v is not None and v != "":
+            return v
     return None
 
 
+IMAGE_WIDTH_KEYS = ("File:ImageWidth", "EXIF:ImageWidth", "PNG:ImageWidth", "QuickTime:ImageWidth")
+IMAGE_HEIGHT_KEYS = ("File:ImageHeight", "EXIF:ImageHeight", "PNG:ImageHeight", "QuickTime:ImageHeight")
+
+
+RE_WS_SPACES = re.compile(r"[ \t]+")
+RE_WS_NEWLINES = re.compile(r"\n{3,}")
+RE_WS_ANY = re.compile(r"\s+")
+RE_KEYISH_SEP = re.compile(r"[-_]")
+RE_BREAK = re.compile(r"\bBREAK\b", re.IGNORECASE)
+
+
 def clean_ws(s: str) -> str:
     s = s.replace("\r\n", "\n").replace("\r", "\n")
-    s = re.sub(r"[ \t]+", " ", s)
-    s = re.sub(r"\n{3,}", "\n\n", s)
+    s = RE_WS_SPACES.sub(" ", s)
+    s = RE_WS_NEWLINES.sub("\n\n", s)
     return s.strip()
 
 
@@ -143,26 +250,41 @@ def _is_camera_model_key(lk: str) -> bool:
 
 
 def iter_node_dicts(workflow: Any) -> Iterable[Dict[str, Any]]:
-    if isinstance(workflow, dict):
-        for container_key in ("prompt", "workflow", "graph"):
-            if container_key in workflow:
-                yield from iter_node_dicts(workflow[container_key])
-
-        nodes = workflow.get("nodes")
-        if isinstance(nodes, dict):
-            yield from iter_node_dicts(nodes)
-        elif isinstance(nodes, list):
-            for item in nodes:
-                if isinstance(item, dict):
-                    yield item
-
-        for v in workflow.values():
-            if isinstance(v, dict) and ("class_type" in v or "inputs" in v or "type" in v):
-                yield v
-    elif isinstance(workflow, list):
-        for item in workflow:
-            if isinstance(item, dict):
-                yield item
+    """
+    Yield node-like dicts from a ComfyUI workflow.
+
+    Iterative walk over an explicit stack (no generator recursion). Work items
+    are pushed in reverse so nodes come out in the same depth-first order as
+    the nested containers appear.
+    """
+    stack: deque = deque([(True, workflow)])
+    while stack:
+        walk, x = stack.pop()
+        if not walk:
+            yield x
+            continue
+
+        tasks: List[Tuple[bool, Any]] = []
+        if isinstance(x, dict):
+            for container_key in ("prompt", "workflow", "graph"):
+                if container_key in x:
+                    tasks.append((True, x[container_key]))
+
+            nodes = x.get("nodes")
+            if isinstance(nodes, dict):
+                tasks.append((True, nodes))
+            elif isinstance(nodes, list):
+                tasks.extend((False, item) for item in nodes if isinstance(item, dict))
+
+            tasks.extend(
+                (False, v)
+                for v in x.values()
+                if isinstance(v, dict) and ("class_type" in v or "inputs" in v or "type" in v)
+            )
+        elif isinstance(x, list):
+            tasks.extend((False, item) for item in x if isinstance(item, dict))
+
+        stack.extend(reversed(tasks))
 
 
 # ---------- prompt parsing + tokenization ----------
@@ -190,77 +312,211 @@ A1111_MARKERS = (
     "lora:",
     "<lora:",
 )
+RE_A1111_MARKERS = re.compile(
+    "|".join(re.escape(m) for m in A1111_MARKERS + ("negative prompt:",)),
+    re.IGNORECASE,
+)
+
+# Negative marker and tail markers in one pattern: a single finditer gives both
+# where the negative prompt starts and where the parameter tail begins.
+RE_NEG_OR_TAIL = re.compile(
+    rf"(?P<neg>{RE_NEG_MARKER.pattern})|(?P<tail>{RE_TAIL_ANY.pattern})",
+    re.IGNORECASE,
+)
+
+AI_MARKERS = ("steps:", "sampler:", "cfg scale:", "negative prompt:", "comfyui", "workflow", "seed:")
+RE_AI_MARKERS = re.compile("|".join(re.escape(m) for m in AI_MARKERS), re.IGNORECASE)
+
 
 def looks_like_a1111_text(s: str) -> bool:
-    low = s.lower()
-    return any(m in low for m in A1111_MARKERS) or ("negative prompt:" in low)
+    return RE_A1111_MARKERS.search(s) is not None
+
+
+def split_a1111_text(t: str) -> Tuple[str, Optional[str]]:
+    """
+    Split an A1111 block into (positive, negative) in one scan.
+
+    With a "Negative prompt:" marker, positive is everything before it and
+    negative runs up to the first tail marker after it. Without one, positive
+    is cut at the first tail marker.
+    """
+    first_tail: Optional[int] = None
+    neg_match = None
+    for m in RE_NEG_OR_TAIL.finditer(t):
+        if neg_match is None:
+            if m.lastgroup == "neg":
+                neg_match = m
+            elif first_tail is None:
+                first_tail = m.start()
+        elif m.lastgroup == "tail":
+            return t[: neg_match.start()].strip(), t[neg_match.end() : m.start()].strip()
+
+    if neg_match is not None:
+        return t[: neg_match.start()].strip(), t[neg_match.end() :].strip()
+    if first_tail is not None:
+        return t[:first_tail].strip(), None
+    return t.strip(), None
 
 
 def _to_int(x: Any) -> Optional[int]:
+    # Exact-type fast paths first; int(str) before int(float(str)) keeps big seeds exact.
+    tx = type(x)
+    if tx is int:
+        return x
+    if x is None or tx is bool or x == "":
+        return None
+    if tx is str:
+        try:
+            return int(x)
+        except ValueError:
+            pass
     try:
-        if isinstance(x, bool):
-            return None
-        if x is None or x == "":
-            return None
         return int(float(x))
     except Exception:
         return None
 
 
 def _to_float(x: Any) -> Optional[float]:
+    tx = type(x)
+    if tx is float:
+        return x
+    if x is None or tx is bool or x == "":
+        return None
     try:
-        if isinstance(x, bool):
-            return None
-        if x is None or x == "":
-            return None
         return float(x)
     except Exception:
         return None
 
 
-def _looks_like_sampler(s: str) -> bool:
-    low = s.lower()
-    tokens = ("euler", "dpm", "ddim", "heun", "lms", "uni", "plms", "ancestral")
-    return any(t in low for t in tokens)
+SAMPLER_HINT_TOKENS = ("euler", "dpm", "ddim", "heun", "lms", "uni", "plms", "ancestral")
+
+
+@functools.lru_cache(maxsize=4096)
+def _widget_text_kind(v: str) -> Tuple[bool, bool]:
+    """Return (looks_like_sampler, is_scheduler) for a widget string, lowercasing once."""
+    low = v.lower()
+    return any(t in low for t in SAMPLER_HINT_TOKENS), low in SCHEDULER_KEYS
+
+
+RE_INT_TEXT = re.compile(r"\s*[-+]?\d+\s*")
+RE_FLOAT_TEXT = re.compile(r"\s*[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\s*")
+
+
+def _widget_number(v: Any) -> Tuple[Optional[int], Optional[float]]:
+    """
+    Classify a widget value as (int_value, float_value) without raising.
+
+    Integers (including numeric strings) keep full precision, so large
+    seeds are not rounded through float.
+    """
+    tv = type(v)
+    if tv is int:
+        return v, v
+    if tv is float:
+        return (int(v) if math.isfinite(v) else None), v
+    if tv is str:
+        if RE_INT_TEXT.fullmatch(v):
+            i = int(v)
+            return i, i
+        if RE_FLOAT_TEXT.fullmatch(v):
+            f = float(v)
+            return (int(f) if math.isfinite(f) else None), f
+    return None, None
 
 
 def parse_ksampler_widgets(values: List[Any]) -> Dict[str, Any]:
+    """
+    Guess KSampler params from positional widgets_values in one pass.
+
+    Seed/steps take the first plausible ints; cfg is picked afterwards
+    because it must not collide with the final steps/seed.
+    """
     out: Dict[str, Any] = {}
+    cfg_candidates: List[float] = []
 
     for v in values:
         if isinstance(v, str):
-            if _looks_like_sampler(v) and "sampler" not in out:
+            is_sampler, is_scheduler = _widget_text_kind(v)
+            if is_sampler and "sampler" not in out:
                 out["sampler"] = v
-            if v.lower() in SCHEDULER_MAP and "scheduler" not in out:
+            if is_scheduler and "scheduler" not in out:
                 out["scheduler"] = v
 
-    for v in values:
-        i = _to_int(v)
-        if i is None:
-            continue
-        if i >= 10000 and "seed" not in out:
-            out["seed"] = i
+        i, f = _widget_number(v)
+        if i is not None:
+            if i >= 10000:
+                if "seed" not in out:
+                    out["seed"] = i
+            elif 1 <= i <= 200 and "steps" not in out:
+                out["steps"] = i
+        if f is not None and 0.1 <= f <= 30:
+            cfg_candidates.append(f)
+
+    steps = out.get("steps")
+    seed = out.get("seed")
+    for f in cfg_candidates:
+        if steps == int(f) or seed == int(f):
             continue
-        if 1 <= i <= 200 and "steps" not in out:
-            out["steps"] = i
-
-    for v in values:
-        f = _to_float(v)
-        if f is None:
-            continue
-        if 0.1 <= f <= 30 and "cfg_scale" not in out:
-            if out.get("steps") == int(f) or out.get("seed") == int(f):
-                continue
-            out["cfg_scale"] = f
+        out["cfg_scale"] = float(f)
+        break
 
     return out
 
 
 def _best_prompt_candidate(values: List[str]) -> Optional[str]:
-    cleaned = [clean_ws(v) for v in values if isinstance(v, str) and v.strip()]
-    if not cleaned:
+    """Longest candidate; callers append clean_ws()'d, non-empty strings."""
+    if not values:
         return None
-    return max(cleaned, key=len)
+    return max(values, key=len)
+
+
+# Common ComfyUI class types, matched by equality before the substring fallback.
+CHECKPOINT_LOADER_TYPES = frozenset({
+    "checkpointloader",
+    "checkpointloadersimple",
+    "checkpointloader|pysssss",
+    "imageonlycheckpointloader",
+    "unclipcheckpointloader",
+})
+KSAMPLER_TYPES = frozenset({
+    "ksampler",
+    "ksampleradvanced",
+    "ksampler (efficient)",
+    "ksampleradvanced (efficient)",
+})
+PROMPT_INPUT_KEYS = frozenset({"text", "prompt", "positive"})
+
+
+@functools.lru_cache(maxsize=1024)
+def _class_type_kind(ct: str) -> Tuple[bool, bool]:
+    """Return (is_checkpoint_loader, is_ksampler) for a lowercased class type."""
+    if ct in CHECKPOINT_LOADER_TYPES:
+        return True, False
+    if ct in KSAMPLER_TYPES:
+        return False, True
+    is_ckpt = "checkpoint" in ct and ("loader" in ct or "load" in ct)
+    return is_ckpt, "ksampler" in ct
+
+
+@functools.lru_cache(maxsize=1024)
+def _prompt_input_side(key: str) -> Optional[str]:
+    """Classify a node input key as "neg", "pos", or None."""
+    key = key.lower()
+    if "negative" in key:
+        return "neg"
+    if key in PROMPT_INPUT_KEYS or "positive" in key:
+        return "pos"
+    return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _prompt_label_side(label: str) -> Optional[str]:
+    """Classify a lowercased node label as "neg", "pos", or None."""
+    if "negative" in label:
+        return "neg"
+    if "prompt" in label or "cliptextencode" in label:
+        return "pos"
+    return None
 
 
 def extract_comfyui_prompts(workflow: Any) -> Tuple[Optional[str], Optional[str]]:
@@ -277,34 +533,34 @@ def extract_comfyui_prompts(workflow: Any) -> Tuple[Optional[str], Optional[str]
     neg_candidates: List[str] = []
 
     for node in iter_node_dicts(workflow):
-        label_parts = [
-            node.get("class_type"),
-            node.get("type"),
-            node.get("title"),
-            node.get("name"),
-        ]
-        label = " ".join(str(p) for p in label_parts if p).lower()
-
-        inputs = node.get("inputs") if isinstance(node.get("inputs"), dict) else {}
-        for k, v in inputs.items():
-            if not isinstance(v, str) or not v.strip():
-                continue
-            key = str(k).lower()
-            if "negative" in key:
-                neg_candidates.append(v)
-            elif key in ("text", "prompt", "positive") or "positive" in key:
-                pos_candidates.append(v)
+        inputs = node.get("inputs")
+        if isinstance(inputs, dict):
+            for k, v in inputs.items():
+                if not isinstance(v, str) or not v.strip():
+                    continue
+                side = _prompt_input_side(str(k))
+                if side == "neg":
+                    neg_candidates.append(clean_ws(v))
+                elif side == "pos":
+                    pos_candidates.append(clean_ws(v))
 
         widgets = node.get("widgets_values")
         if isinstance(widgets, list):
-            widget_text = [v for v in widgets if isinstance(v, str) and v.strip()]
+            widget_text = [clean_ws(v) for v in widgets if isinstance(v, str) and v.strip()]
             if widget_text:
-                best = _best_prompt_candidate(widget_text)
-                if not best:
+                label_parts = (
+                    node.get("class_type"),
+                    node.get("type"),
+                    node.get("title"),
+                    node.get("name"),
+                )
+                side = _prompt_label_side(" ".join(str(p) for p in label_parts if p).lower())
+                if side is None:
                     continue
-                if "negative" in label:
+                best = _best_prompt_candidate(widget_text)
+                if side == "neg":
                     neg_candidates.append(best)
-                elif "prompt" in label or "cliptextencode" in label:
+                else:
                     pos_candidates.append(best)
 
     pos = _best_prompt_candidate(pos_candidates)
@@ -317,15 +573,19 @@ def extract_comfyui_params(workflow: Any) -> Dict[str, Any]:
 
     for node in iter_node_dicts(workflow):
         ct_raw = node.get("class_type") or node.get("type") or ""
-        ct = str(ct_raw).lower()
-        inputs = node.get("inputs") if isinstance(node.get("inputs"), dict) else {}
+        is_ckpt, is_ksampler = _class_type_kind(str(ct_raw).lower())
+        if not (is_ckpt or is_ksampler):
+            continue
+        inputs = node.get("inputs")
+        if not isinstance(inputs, dict):
+            inputs = {}
 
-        if ("checkpoint" in ct and ("loader" in ct or "load" in ct)) and "model" not in out:
+        if is_ckpt and "model" not in out:
             model = inputs.get("ckpt_name") or inputs.get("model_name") or inputs.get("checkpoint")
             if isinstance(model, str) and model.strip():
-                out["model"] = model.strip()
+                out["model"] = sys.intern(model.strip())
 
-        if "ksampler" in ct:
+        if is_ksampler:
             params: Dict[str, Any] = {}
             if isinstance(inputs, dict):
                 seed = _to_int(inputs.get("seed"))
@@ -340,9 +600,9 @@ def extract_comfyui_params(workflow: Any) -> Dict[str, Any]:
                 if cfg is not None:
                     params["cfg_scale"] = cfg
                 if isinstance(sampler, str) and sampler.strip():
-                    params["sampler"] = sampler.strip()
+                    params["sampler"] = sys.intern(sampler.strip())
                 if isinstance(scheduler, str) and scheduler.strip():
-                    params["scheduler"] = scheduler.strip()
+                    params["scheduler"] = sys.intern(scheduler.strip())
 
             widgets = node.get("widgets_values")
             if isinstance(widgets, list):
@@ -374,6 +634,8 @@ def enforce_pos_neg_separation(pos: Optional[str], neg: Optional[str]) -> Tuple[
     Rules:
     - If "Negative prompt:" appears inside pos, split at first occurrence.
     - If neg accidentally contains parameter tail markers, cut them off.
+
+    Returned strings are clean_ws()'d.
     """
     p = clean_ws(pos) if isinstance(pos, str) and pos.strip() else None
     n = clean_ws(neg) if isinstance(neg, str) and neg.strip() else None
@@ -397,54 +659,57 @@ def enforce_pos_neg_separation(pos: Optional[str], neg: Optional[str]) -> Tuple[
     return p, n
 
 
-def split_tokens_top_level(s: str) -> List[str]:
+RE_BRACKET_CHARS = re.compile(r"[()\[\]{}]")
+RE_SPLIT_CHARS = re.compile(r"[()\[\]{},]")
+NEWLINE_TO_COMMA = str.maketrans({"\n": ","})
+BRACKET_DEPTH = {"(": (0, 1), ")": (0, -1), "[": (1, 1), "]": (1, -1), "{": (2, 1), "}": (2, -1)}
+
+
+def split_tokens_top_level(s: str, cleaned: bool = False) -> List[str]:
     """
     Split on commas/newlines, ignoring commas inside (), [], {}.
     Also treats the A1111 'BREAK' marker as a delimiter.
+
+    Text without brackets is split with str.split; otherwise only the
+    bracket/comma offsets are visited and tokens are sliced from s. Pass
+    cleaned=True when s already went through clean_ws().
     """
-    s = clean_ws(s)
+    if not cleaned:
+        s = clean_ws(s)
     # Normalize separators
-    s = s.replace("\n", ",")
-    s = re.sub(r"\bBREAK\b", ",", s, flags=re.IGNORECASE)
+    s = s.translate(NEWLINE_TO_COMMA)
+    s = RE_BREAK.sub(",", s)
+
+    if RE_BRACKET_CHARS.search(s) is None:
+        return [tok for tok in (p.strip() for p in s.split(",")) if tok]
 
     out: List[str] = []
-    buf: List[str] = []
-    depth_paren = 0
-    depth_brack = 0
-    depth_brace = 0
-
-    for ch in s:
-        if ch == "(":
-            depth_paren += 1
-        elif ch == ")":
-            depth_paren = max(0, depth_paren - 1)
-        elif ch == "[":
-            depth_brack += 1
-        elif ch == "]":
-            depth_brack = max(0, depth_brack - 1)
-        elif ch == "{":
-            depth_brace += 1
-        elif ch == "}":
-            depth_brace = max(0, depth_brace - 1)
-
-        if ch == "," and depth_paren == 0 and depth_brack == 0 and depth_brace == 0:
-            tok = "".join(buf).strip()
-            if tok:
-                out.append(tok)
-            buf = []
+    start = 0
+    depth = [0, 0, 0]  # (), [], {}
+
+    for m in RE_SPLIT_CHARS.finditer(s):
+        ch = m.group()
+        if ch == ",":
+            if not (depth[0] or depth[1] or depth[2]):
+                tok = s[start : m.start()].strip()
+                if tok:
+                    out.append(tok)
+                start = m.end()
         else:
-            buf.append(ch)
+            idx, step = BRACKET_DEPTH[ch]
+            depth[idx] = max(0, depth[idx] + step)
 
-    tail = "".join(buf).strip()
+    tail = s[start:].strip()
     if tail:
         out.append(tail)
 
-    return [t.strip() for t in out if t and t.strip()]
+    return out
 
 
+@functools.lru_cache(maxsize=8192)
 def token_norm(t: str) -> str:
     t = t.strip().lower()
-    t = re.sub(r"\s+", " ", t)
+    t = RE_WS_ANY.sub(" ", t)
     return t
 
 
@@ -479,15 +744,15 @@ def parse_weighted_token(raw: str) -> Tuple[str, float]:
     return r, 1.0
 
 
-def tokenize_prompt(s: str) -> List[Dict[str, Any]]:
+def tokenize_prompt(s: str, cleaned: bool = False) -> List[Dict[str, Any]]:
     """
     Tokenize into comma-separated tokens, preserving explicit weights.
     Output (stored into kv.v_json):
       [{"t": "...", "t_norm": "...", "w": 1.0}, ...]
 
-    Dedupe by t_norm (keeps last-seen weight).
+    Dedupe by t_norm (keeps first position, last-seen text and weight).
     """
-    toks = split_tokens_top_level(s)
+    toks = split_tokens_top_level(s, cleaned=cleaned)
     dedup: Dict[str, Dict[str, Any]] = {}
 
     for raw in toks:
@@ -496,23 +761,30 @@ def tokenize_prompt(s: str) -> List[Dict[str, Any]]:
         if not token:
             continue
 
-        tn = token_norm(token)
+        # Tags repeat heavily across a gallery; interning shares one string object per tag.
+        tn = sys.intern(token_norm(token))
         # Drop pure BREAK tokens or empty artifacts
         if tn in ("break",):
             continue
 
-        dedup[tn] = {"t": token, "t_norm": tn, "w": w}
+        entry = dedup.get(tn)
+        if entry is None:
+            dedup[tn] = {"t": sys.intern(token), "t_norm": tn, "w": w}
+        else:
+            # Duplicate tag: update in place rather than building a new dict.
+            entry["t"] = sys.intern(token)
+            entry["w"] = w
 
     return list(dedup.values())
 
 
 # ---------- parameter normalization ----------
 
+@functools.lru_cache(maxsize=8192)
 def norm_keyish(s: str) -> str:
     s = s.strip().lower()
-    s = s.replace("-", " ")
-    s = s.replace("_", " ")
-    s = re.sub(r"\s+", " ", s).strip()
+    s = RE_KEYISH_SEP.sub(" ", s)
+    s = RE_WS_ANY.sub(" ", s).strip()
     return s
 
 
@@ -545,6 +817,11 @@ SAMPLER_MAP = {
 def normalize_sampler(s: Any) -> Optional[str]:
     if not isinstance(s, str) or not s.strip():
         return None
+    return _normalize_sampler_str(s)
+
+
+@functools.lru_cache(maxsize=8192)
+def _normalize_sampler_str(s: str) -> str:
     k = norm_keyish(s)
     return SAMPLER_MAP.get(k, k.replace(" ", "_"))
 
@@ -558,11 +835,17 @@ SCHEDULER_MAP = {
     "sgm uniform": "sgm_uniform",
     "sgm_uniform": "sgm_uniform",
 }
+SCHEDULER_KEYS = frozenset(SCHEDULER_MAP)
 
 
 def normalize_scheduler(s: Any) -> Optional[str]:
     if not isinstance(s, str) or not s.strip():
         return None
+    return _normalize_scheduler_str(s)
+
+
+@functools.lru_cache(maxsize=8192)
+def _normalize_scheduler_str(s: str) -> str:
     k = norm_keyish(s)
     return SCHEDULER_MAP.get(k, k.replace(" ", "_"))
 
@@ -604,7 +887,7 @@ def postprocess_prompts_and_params(rec: Dict[str, Any]) -> None:
         rec["prompt"] = pos
         kv["prompt"] = pos
         kv["prompt_text"] = pos
-        kv["prompt_tokens"] = tokenize_prompt(pos)
+        kv["prompt_tokens"] = tokenize_prompt(pos, cleaned=True)
     else:
         rec["prompt"] = None
         kv.pop("prompt", None)
@@ -615,7 +898,7 @@ def postprocess_prompts_and_params(rec: Dict[str, Any]) -> None:
         rec["negative_prompt"] = neg
         kv["negative_prompt"] = neg
         kv["neg_prompt_text"] = neg
-        kv["neg_tokens"] = tokenize_prompt(neg)
+        kv["neg_tokens"] = tokenize_prompt(neg, cleaned=True)
     else:
         rec["negative_prompt"] = None
         kv.pop("negative_prompt", None)
@@ -681,17 +964,41 @@ TEXT_CANDIDATE_KEYS = [
     "IFD0:ImageDescription",
     "IFD0:Software",
 ]
+TEXT_CANDIDATE_KEY_SET = frozenset(TEXT_CANDIDATE_KEYS)
+
+# All A1111 "Key: value" fields in one pattern so the text is scanned once.
+# Each branch is a lookahead, so fields never consume each other's text and
+# the first occurrence of every field is found exactly as a per-field search would.
+RE_A1111_FIELDS = re.compile(
+    r"\b(?:"
+    r"(?=Size:\s*(?P<w>\d+)\s*x\s*(?P<h>\d+)\b)"
+    r"|(?=Steps:\s*(?P<steps>\d+)\b)"
+    r"|(?=CFG\s*scale:\s*(?P<cfg>[0-9.]+)\b)"
+    r"|(?=Seed:\s*(?P<seed>\d+)\b)"
+    r"|(?=Sampler:\s*(?P<sampler>[^,\n]+)\b)"
+    r"|(?=Scheduler:\s*(?P<sched>[^,\n]+)\b)"
+    r"|(?=Model:\s*(?P<model>[^,\n]+)\b)"
+    r")",
+    re.IGNORECASE,
+)
+
 
-RE_A1111_SIZE = re.compile(r"\bSize:\s*(\d+)\s*x\s*(\d+)\b", re.IGNORECASE)
-RE_A1111_STEPS = re.compile(r"\bSteps:\s*(\d+)\b", re.IGNORECASE)
-RE_A1111_CFG = re.compile(r"\bCFG\s*scale:\s*([0-9.]+)\b", re.IGNORECASE)
-RE_A1111_SEED = re.compile(r"\bSeed:\s*(\d+)\b", re.IGNORECASE)
-RE_A1111_SAMPLER = re.compile(r"\bSampler:\s*([^,\\n]+)\b", re.IGNORECASE)
-RE_A1111_SCHEDULER = re.compile(r"\bScheduler:\s*([^,\\n]+)\b", re.IGNORECASE)
-RE_A1111_MODEL = re.compile(r"\bModel:\s*([^,\\n]+)\b", re.IGNORECASE)
+@functools.lru_cache(maxsize=16384, typed=True)
+def _lower_key(k: Any) -> str:
+    """
+    Lowercased key for EXIF tags and workflow JSON. The same names repeat in
+    every record, so one shared memo replaces per-record lowercase views.
+    """
+    return str(k).lower()
 
 
 def extract_candidate_blobs(exif_obj: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    Collect (key, text) pairs that may hold AI metadata.
+
+    Each key appears at most once (fixed candidates first, then marker hits
+    from the remaining keys), so no dedupe pass over the values is needed.
+    """
     blobs: List[Tuple[str, str]] = []
 
     for k in TEXT_CANDIDATE_KEYS:
@@ -699,25 +1006,16 @@ def extract_candidate_blobs(exif_obj: Dict[str, Any]) -> List[Tuple[str, str]]:
         if isinstance(v, str) and v.strip():
             blobs.append((k, v))
 
-    ai_markers = ("steps:", "sampler:", "cfg scale:", "negative prompt:", "comfyui", "workflow", "seed:")
+    # Fixed candidate keys were already taken above; skip them here.
     for k, v in exif_obj.items():
-        if not isinstance(v, str):
+        if not isinstance(v, str) or k in TEXT_CANDIDATE_KEY_SET:
             continue
-        s = v.strip()
-        if len(s) < 30:
+        if len(v) < 30 or len(v.strip()) < 30:
             continue
-        low = s.lower()
-        if any(m in low for m in ai_markers):
+        if RE_AI_MARKERS.search(v):
             blobs.append((k, v))
 
-    seen = set()
-    out: List[Tuple[str, str]] = []
-    for k, v in blobs:
-        key = (k, v)
-        if key not in seen:
-            seen.add(key)
-            out.append((k, v))
-    return out
+    return blobs
 
 
 def parse_a1111_parameters(text: str) -> Dict[str, Any]:
@@ -727,59 +1025,65 @@ def parse_a1111_parameters(text: str) -> Dict[str, Any]:
     out: Dict[str, Any] = {}
     t = clean_ws(text)
 
-    pos = None
-    neg = None
-
-    m = RE_NEG_MARKER.search(t)
-    if m:
-        pos = t[: m.start()].strip()
-        rest = t[m.end() :].strip()
-
-        # Cut negative at first tail marker (Steps:, Sampler:, Civitai resources, etc.)
-        neg = cut_at_tail_markers(rest)
-    else:
-        # If no negative prompt marker, treat top block as prompt, but try to cut off tail markers
-        pos = cut_at_tail_markers(t)
+    # Negative is cut at the first tail marker (Steps:, Sampler:, Civitai resources, etc.);
+    # without a negative marker the top block is the prompt, cut at the tail markers.
+    pos, neg = split_a1111_text(t)
 
     if pos:
         out["prompt"] = pos
     if neg:
         out["negative_prompt"] = neg
 
-    m = RE_A1111_SIZE.search(t)
-    if m:
-        out["width"] = int(m.group(1))
-        out["height"] = int(m.group(2))
-
-    m = RE_A1111_STEPS.search(t)
-    if m:
-        out["steps"] = int(m.group(1))
-
-    m = RE_A1111_CFG.search(t)
-    if m:
-        out["cfg_scale"] = float(m.group(1))
-
-    m = RE_A1111_SEED.search(t)
-    if m:
-        out["seed"] = int(m.group(1))
-
-    m = RE_A1111_SAMPLER.search(t)
-    if m:
-        out["sampler"] = m.group(1).strip()
-
-    m = RE_A1111_SCHEDULER.search(t)
-    if m:
-        out["scheduler"] = m.group(1).strip()
-
-    m = RE_A1111_MODEL.search(t)
-    if m:
-        out["model"] = m.group(1).strip()
+    for m in RE_A1111_FIELDS.finditer(t):
+        field = m.lastgroup
+        if field == "h":
+            if "width" not in out:
+                out["width"] = int(m.group("w"))
+                out["height"] = int(m.group("h"))
+        elif field == "steps":
+            out.setdefault("steps", int(m.group("steps")))
+        elif field == "cfg":
+            if "cfg_scale" not in out:
+                out["cfg_scale"] = float(m.group("cfg"))
+        elif field == "seed":
+            out.setdefault("seed", int(m.group("seed")))
+        elif field == "sampler":
+            if "sampler" not in out:
+                out["sampler"] = sys.intern(m.group("sampler").strip())
+        elif field == "sched":
+            if "scheduler" not in out:
+                out["scheduler"] = sys.intern(m.group("sched").strip())
+        elif field == "model":
+            if "model" not in out:
+                out["model"] = sys.intern(m.group("model").strip())
 
     out["raw_text"] = t[:2000]
     out["format_hint"] = "a1111_like"
     return out
 
 
+COMFY_NUMERIC_KEYS = frozenset({"seed", "steps", "cfg", "cfg_scale", "width", "height"})
+_NO_KEY = object()
+
+
+def _find_prompt_pair(x: Dict[Any, Any]) -> Optional[Tuple[str, str]]:
+    """Return (positive, negative) if this dict holds a known prompt key pair."""
+    keys = {_lower_key(k): k for k in x.keys()}
+    # prompt/negative_prompt
+    if "prompt" in keys and ("negative_prompt" in keys or "negative prompt" in keys):
+        p = x[keys["prompt"]]
+        n = x[keys.get("negative_prompt") or keys.get("negative prompt")]
+        if isinstance(p, str) and isinstance(n, str):
+            return (p, n)
+    # positive/negative
+    if "positive" in keys and "negative" in keys:
+        p = x[keys["positive"]]
+        n = x[keys["negative"]]
+        if isinstance(p, str) and isinstance(n, str):
+            return (p, n)
+    return None
+
+
 def parse_comfyui_embedded_json(blob: Any) -> Optional[Dict[str, Any]]:
     """
     ComfyUI often embeds JSON for prompt/workflow. We don't assume exact structure.
@@ -797,50 +1101,23 @@ def parse_comfyui_embedded_json(blob: Any) -> Optional[Dict[str, Any]]:
         "workflow_json": blob,
     }
 
-    def walk(x):
+    # One pre-order DFS records numeric fields (last write wins) and the first
+    # prompt pair; entries are (key, value) so sibling order matches recursion.
+    pair: Optional[Tuple[str, str]] = None
+    stack: deque = deque([(_NO_KEY, blob)])
+    while stack:
+        k, x = stack.pop()
+        if k is not _NO_KEY:
+            lk = _lower_key(k)
+            if lk in COMFY_NUMERIC_KEYS and isinstance(x, (int, float, str)):
+                rec[lk] = x
         if isinstance(x, dict):
-            for k, v in x.items():
-                yield k, v
-                yield from walk(v)
+            if pair is None:
+                pair = _find_prompt_pair(x)
+            stack.extend(reversed(x.items()))
         elif isinstance(x, list):
-            for v in x:
-                yield from walk(v)
-
-    numeric_keys = {"seed", "steps", "cfg", "cfg_scale", "width", "height"}
-    for k, v in walk(blob):
-        lk = str(k).lower()
-        if lk in numeric_keys and isinstance(v, (int, float, str)):
-            rec[lk] = v
+            stack.extend((_NO_KEY, v) for v in reversed(x))
 
-    # Conservative prompt extraction: look for dicts containing known pairs
-    def find_prompt_pairs(x: Any) -> Optional[Tuple[str, str]]:
-        if isinstance(x, dict):
-            keys = {str(k).lower(): k for k in x.keys()}
-            # prompt/negative_prompt
-            if "prompt" in keys and ("negative_prompt" in keys or "negative prompt" in keys):
-                p = x[keys["prompt"]]
-                n = x[keys.get("negative_prompt") or keys.get("negative prompt")]
-                if isinstance(p, str) and isinstance(n, str):
-                    return (p, n)
-            # positive/negative
-            if "positive" in keys and "negative" in keys:
-                p = x[keys["positive"]]
-                n = x[keys["negative"]]
-                if isinstance(p, str) and isinstance(n, str):
-                    return (p, n)
-
-            for v in x.values():
-                r = find_prompt_pairs(v)
-                if r:
-                    return r
-        elif isinstance(x, list):
-            for v in x:
-                r = find_prompt_pairs(v)
-                if r:
-                    return r
-        return None
-
-    pair = find_prompt_pairs(blob)
     if pair:
         rec["prompt"] = pair[0]
         rec["negative_prompt"] = pair[1]
@@ -853,22 +1130,38 @@ def parse_comfyui_embedded_json(blob: Any) -> Optional[Dict[str, Any]]:
     return rec
 
 
-def normalize_record(exif_obj: Dict[str, Any]) -> Dict[str, Any]:
+def source_paths(exif_obj: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """
+    Return (repo-relative, absolute) source path strings for an EXIF object.
+    """
     src_raw = exif_obj.get("SourceFile") or exif_obj.get("File:FileName") or ""
-    src = ""
-    src_abs: Optional[str] = None
     if isinstance(src_raw, str) and src_raw:
-        rel_path, abs_path = resolve_repo_relative(src_raw, allow_absolute=True)
-        src = str(rel_path)
-        src_abs = str(abs_path)
+        return _resolve_repo_relative_cached(src_raw)
+    return "", None
+
+
+def normalize_record(
+    exif_obj: Dict[str, Any],
+    digests: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Normalize one ExifTool object. If `digests` (from prehash_paths) is given,
+    sha256 is looked up there instead of hashing the file inline.
+    """
+    src, src_abs = source_paths(exif_obj)
+    if digests is not None:
+        sha256 = digests.get(src_abs) if src_abs else None
+    else:
+        sha256 = sha256_file(src_abs) if isinstance(src_abs, str) and os.path.isfile(src_abs) else None
     file_name = os.path.basename(src) if isinstance(src, str) and src else None
-    ext = os.path.splitext(file_name or "")[1].lower().lstrip(".") if file_name else None
+    ext = sys.intern(os.path.splitext(file_name)[1].lower().lstrip(".")) if file_name else None
 
-    width = first_present(exif_obj, ["File:ImageWidth", "EXIF:ImageWidth", "PNG:ImageWidth", "QuickTime:ImageWidth"])
-    height = first_present(exif_obj, ["File:ImageHeight", "EXIF:ImageHeight", "PNG:ImageHeight", "QuickTime:ImageHeight"])
+    width = first_present(exif_obj, IMAGE_WIDTH_KEYS)
+    height = first_present(exif_obj, IMAGE_HEIGHT_KEYS)
 
     rec: Dict[str, Any] = {
-        "id": stable_id_for_path(src) if isinstance(src, str) and src else str(uuid.uuid4()),
+        # src is already repo-relative, so hash it directly instead of resolving again.
+        "id": _stable_id_for_rel(src) if src else str(uuid.uuid4()),
         "source_file": src,
         "file_name": file_name,
         "ext": ext,
@@ -876,7 +1169,7 @@ def normalize_record(exif_obj: Dict[str, Any]) -> Dict[str, Any]:
         "height": int(height) if isinstance(height, (int, float, str)) and str(height).isdigit() else None,
         "imported_utc": utc_now_iso(),
         "created_utc": None,
-        "sha256": sha256_file(src_abs) if isinstance(src_abs, str) and os.path.isfile(src_abs) else None,
+        "sha256": sha256,
         "format_hint": None,
         "prompt": None,
         "negative_prompt": None,
@@ -948,7 +1241,7 @@ def normalize_record(exif_obj: Dict[str, Any]) -> Dict[str, Any]:
             continue
         if is_probably_json(v):
             continue
-        if "workflow" in str(k).lower():
+        if "workflow" in _lower_key(k):
             continue
         if looks_like_a1111_text(v):
             parsed = parse_a1111_parameters(v)
@@ -989,7 +1282,7 @@ def normalize_record(exif_obj: Dict[str, Any]) -> Dict[str, Any]:
 
     software = first_present(exif_obj, ["EXIF:Software", "PNG:Software", "XMP:CreatorTool"])
     if isinstance(software, str) and software.strip():
-        kv["software"] = software.strip()
+        kv["software"] = sys.intern(software.strip())
 
     # NEW: enforce pos/neg separation + tokenization + param normalization
     postprocess_prompts_and_params(rec)
@@ -999,44 +1292,137 @@ def normalize_record(exif_obj: Dict[str, Any]) -> Dict[str, Any]:
 
 # ---------- DB ingest ----------
 
+# Below this many records, process start-up and pickling cost more than they save.
+PARALLEL_NORMALIZE_MIN = 2000
+_worker_digests: Optional[Dict[str, str]] = None
+
+
+def _init_normalize_worker(digests: Optional[Dict[str, str]]) -> None:
+    global _worker_digests
+    _worker_digests = digests
+
+
+def _normalize_in_worker(exif_obj: Dict[str, Any]) -> Dict[str, Any]:
+    return normalize_record(exif_obj, _worker_digests)
+
+
+def normalize_records(
+    exif_objs: List[Dict[str, Any]],
+    digests: Optional[Dict[str, str]] = None,
+    parallel_min: int = PARALLEL_NORMALIZE_MIN,
+) -> List[Dict[str, Any]]:
+    """
+    normalize_record over many objects, in input order.
+
+    normalize_record is pure-Python CPU work, so large inputs are spread over a
+    process pool; `digests` is sent once per worker instead of once per task.
+    """
+    _resolve_repo_relative_cached.cache_clear()
+    workers = os.cpu_count() or 1
+    if len(exif_objs) < parallel_min or workers < 2:
+        return [normalize_record(o, digests) for o in exif_objs]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_normalize_worker,
+        initargs=(digests,),
+    ) as pool:
+        return list(pool.map(_normalize_in_worker, exif_objs, chunksize=256))
+
+
+# Columns added to `images` after the first schema; older DBs get them via ALTER TABLE.
+IMAGE_FINGERPRINT_COLUMNS = (("size", "INTEGER"), ("mtime_ns", "INTEGER"))
+
+
 def init_db(db_path: str, schema_sql_path: str) -> None:
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
     with sqlite3.connect(db_path) as conn:
         conn.execute("PRAGMA foreign_keys=ON;")
         with open(schema_sql_path, "r", encoding="utf-8") as f:
             conn.executescript(f.read())
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(images)")}
+        for name, decl in IMAGE_FINGERPRINT_COLUMNS:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE images ADD COLUMN {name} {decl}")
+
+
+def load_file_fingerprints(conn: sqlite3.Connection) -> Dict[str, Tuple[int, int, str]]:
+    """Return {source_file: (size, mtime_ns, sha256)} for rows with a complete fingerprint."""
+    rows = conn.execute(
+        "SELECT source_file, size, mtime_ns, sha256 FROM images "
+        "WHERE size IS NOT NULL AND mtime_ns IS NOT NULL AND sha256 IS NOT NULL"
+    )
+    return {src: (size, mtime_ns, sha) for src, size, mtime_ns, sha in rows}
+
+
+IMAGE_UPSERT_SQL = """
+  INSERT INTO images(id, source_file, file_name, ext, width, height, created_utc, imported_utc, sha256, format_hint, raw_text_preview, size, mtime_ns)
+  VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?)
+  ON CONFLICT(source_file) DO UPDATE SET
+    file_name=excluded.file_name,
+    ext=excluded.ext,
+    width=excluded.width,
+    height=excluded.height,
+    sha256=excluded.sha256,
+    format_hint=excluded.format_hint,
+    raw_text_preview=excluded.raw_text_preview,
+    size=excluded.size,
+    mtime_ns=excluded.mtime_ns
+"""
+
+# kv rows are owned by their image and rewritten in full on every ingest:
+# clear them per image, then insert without per-row upsert resolution.
+# OR REPLACE only matters if one batch holds the same image twice.
+KV_DELETE_SQL = "DELETE FROM kv WHERE image_id=?"
+KV_INSERT_SQL = """
+  INSERT OR REPLACE INTO kv(image_id, k, v, v_num, v_json)
+  VALUES(?,?,?,?,?)
+"""
 
+# Applied only for the duration of a bulk ingest, then restored.
+BULK_PRAGMAS = (
+    "PRAGMA synchronous=OFF;",
+    "PRAGMA foreign_keys=OFF;",
+    "PRAGMA temp_store=MEMORY;",
+    "PRAGMA cache_size=-200000;",
+    "PRAGMA cache_spill=OFF;",  # keep dirty pages in memory until COMMIT
+)
+RESTORE_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA foreign_keys=ON;",
+    "PRAGMA cache_size=-65536;",
+    "PRAGMA cache_spill=ON;",
+)
 
-def upsert_record(conn: sqlite3.Connection, rec: Dict[str, Any]) -> None:
-    conn.execute("PRAGMA foreign_keys=ON;")
-    conn.execute(
-        """
-      INSERT INTO images(id, source_file, file_name, ext, width, height, created_utc, imported_utc, sha256, format_hint, raw_text_preview)
-      VALUES(?,?,?,?,?,?,?,?,?,?,?)
-      ON CONFLICT(source_file) DO UPDATE SET
-        file_name=excluded.file_name,
-        ext=excluded.ext,
-        width=excluded.width,
-        height=excluded.height,
-        sha256=excluded.sha256,
-        format_hint=excluded.format_hint,
-        raw_text_preview=excluded.raw_text_preview
-    """,
-        (
-            rec["id"],
-            rec["source_file"],
-            rec["file_name"],
-            rec["ext"],
-            rec["width"],
-            rec["height"],
-            rec["created_utc"],
-            rec["imported_utc"],
-            rec["sha256"],
-            rec["format_hint"],
-            rec["raw_text_preview"],
-        ),
+
+def _image_row(
+    rec: Dict[str, Any],
+    fingerprints: Optional[Dict[str, Tuple[int, int]]] = None,
+) -> Tuple[Any, ...]:
+    # Without a fingerprint size/mtime_ns are stored as NULL, so the next run rehashes.
+    size, mtime_ns = (fingerprints or {}).get(rec["source_file"], (None, None))
+    return (
+        rec["id"],
+        rec["source_file"],
+        rec["file_name"],
+        rec["ext"],
+        rec["width"],
+        rec["height"],
+        rec["created_utc"],
+        rec["imported_utc"],
+        rec["sha256"],
+        rec["format_hint"],
+        rec["raw_text_preview"],
+        size,
+        mtime_ns,
     )
 
+
+# Plain decimal numbers only ("1e5", "inf" stay text); \s* stands in for strip().
+RE_KV_NUMBER = re.compile(r"\s*-?\d+(?:\.\d+)?\s*")
+
+
+def _kv_rows(rec: Dict[str, Any]) -> Iterable[Tuple[Any, ...]]:
+    image_id = rec["id"]
     for k, v in rec.get("kv", {}).items():
         v_text: Optional[str] = None
         v_num: Optional[float] = None
@@ -1046,44 +1432,132 @@ def upsert_record(conn: sqlite3.Connection, rec: Dict[str, Any]) -> None:
             v_num = float(v)
             v_text = str(v)
         elif isinstance(v, (dict, list)):
-            v_json = json.dumps(v, ensure_ascii=False)
+            # Decoded to str so SQLite stores TEXT (json_each() reads it in wildcards).
+            v_json = jsonio.dumps(v).decode("utf-8")
             v_text = None
         else:
             v_text = str(v)
-            try:
-                v_num = float(v_text) if re.fullmatch(r"-?\d+(\.\d+)?", v_text.strip()) else None
-            except Exception:
-                v_num = None
+            if RE_KV_NUMBER.fullmatch(v_text):
+                v_num = float(v_text)
 
-        conn.execute(
-            """
-          INSERT INTO kv(image_id, k, v, v_num, v_json)
-          VALUES(?,?,?,?,?)
-          ON CONFLICT(image_id, k) DO UPDATE SET
-            v=excluded.v,
-            v_num=excluded.v_num,
-            v_json=excluded.v_json
-        """,
-            (rec["id"], k, v_text, v_num, v_json),
-        )
+        yield (image_id, k, v_text, v_num, v_json)
 
 
-def load_jsonl(path: str) -> List[Dict[str, Any]]:
+# Per-connection settings (schema.sql only applies them to the init_db connection).
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA foreign_keys=ON;",
+    "PRAGMA temp_store=MEMORY;",
+    "PRAGMA cache_size=-65536;",
+    "PRAGMA mmap_size=268435456;",
+    "PRAGMA busy_timeout=5000;",
+)
+
+
+def connect_db(db_path: str) -> sqlite3.Connection:
+    """Open the images DB with per-connection settings applied once."""
+    conn = sqlite3.connect(db_path)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def upsert_record(db: Union[sqlite3.Connection, sqlite3.Cursor], rec: Dict[str, Any]) -> None:
+    """
+    Upsert one record through a connection or a reused cursor.
+    Open the connection with connect_db() so foreign keys are on.
+    """
+    db.execute(IMAGE_UPSERT_SQL, _image_row(rec))
+    db.execute(KV_DELETE_SQL, (rec["id"],))
+    db.executemany(KV_INSERT_SQL, _kv_rows(rec))
+
+
+def upsert_records(
+    conn: sqlite3.Connection,
+    records: List[Dict[str, Any]],
+    fingerprints: Optional[Dict[str, Tuple[int, int]]] = None,
+) -> None:
+    """
+    Bulk variant of upsert_record: one transaction, one executemany per table.
+    Durability/FK pragmas are relaxed for the bulk window and restored after.
+    `fingerprints` maps source_file to (size, mtime_ns) for the hash cache.
+    """
+    for pragma in BULK_PRAGMAS:
+        conn.execute(pragma)
+    try:
+        with conn:
+            # One cursor for both statements; the SQL constants hit sqlite3's statement cache.
+            cur = conn.cursor()
+            cur.executemany(IMAGE_UPSERT_SQL, (_image_row(r, fingerprints) for r in records))
+            cur.executemany(KV_DELETE_SQL, ((r["id"],) for r in records))
+            cur.executemany(KV_INSERT_SQL, (row for r in records for row in _kv_rows(r)))
+            cur.close()
+    finally:
+        for pragma in RESTORE_PRAGMAS:
+            conn.execute(pragma)
+
+
+JSONL_IO_BUFFER = 1 << 20
+UTF8_BOM = b"\xef\xbb\xbf"
+
+
+def read_exif_jsonl(path: str) -> List[Dict[str, Any]]:
+    """
+    Read ExifTool JSONL in binary mode with a large buffer.
+
+    Lines are parsed straight from bytes (no text decode pass); blank lines and
+    per-line BOMs are skipped like the old text-mode reader did.
+    """
+    out: List[Dict[str, Any]] = []
+    with open(path, "rb", buffering=JSONL_IO_BUFFER) as f_in:
+        for line in f_in:
+            line = line.strip()
+            if line.startswith(UTF8_BOM):
+                line = line[len(UTF8_BOM) :].lstrip()
+            if not line:
+                continue
+            out.append(jsonio.loads(line))
+    return out
+
+
+def write_jsonl(path: str, records: Iterable[Union[Dict[str, Any], bytes]]) -> None:
+    """Write one compact JSON object per line (``jsonio.dumps_line``) through a 1 MiB buffer.
+
+    Items that are already-encoded ``bytes`` lines (see ``load_jsonl_lines``)
+    are written verbatim instead of being re-encoded.
+    """
+    with open(path, "wb", buffering=JSONL_IO_BUFFER) as f_out:
+        for rec in records:
+            if type(rec) is bytes:
+                f_out.write(rec)
+                f_out.write(b"\n")
+                continue
+            f_out.write(jsonio.dumps_line(rec))
+
+
+def load_jsonl_lines(path: str) -> List[Tuple[Dict[str, Any], bytes]]:
+    """Like ``load_jsonl`` but pairs each record with its stripped source line."""
     if not os.path.exists(path):
         return []
-    out: List[Dict[str, Any]] = []
-    with open(path, "r", encoding="utf-8") as f:
+    out: List[Tuple[Dict[str, Any], bytes]] = []
+    # Bytes straight into the parser: no per-line str decode.
+    with open(path, "rb", buffering=JSONL_IO_BUFFER) as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
             try:
-                out.append(json.loads(line))
+                out.append((jsonio.loads(line), line))
             except Exception:
                 continue
     return out
 
 
+def load_jsonl(path: str) -> List[Dict[str, Any]]:
+    return [rec for rec, _line in load_jsonl_lines(path)]
+
+
 PROMPT_KEY_HINTS = ("prompt", "positive", "pos_prompt", "positive_prompt")
 NEG_PROMPT_KEY_HINTS = ("negative prompt", "negative_prompt", "neg_prompt", "negprompt", "negative")
 MODEL_KEY_HINTS = ("model", "checkpoint", "ckpt")
@@ -1096,6 +1570,63 @@ WIDTH_KEY_HINTS = ("width",)
 HEIGHT_KEY_HINTS = ("height",)
 
 
+# String-valued keys try these in order; the first three claim the key outright,
+# the rest only when their field is still unset (otherwise fall through).
+_STR_FIELD_ORDER = (
+    ("negative_prompt", NEG_PROMPT_KEY_HINTS),
+    ("prompt", PROMPT_KEY_HINTS),
+    ("model", MODEL_KEY_HINTS),
+    ("sampler", SAMPLER_KEY_HINTS),
+    ("scheduler", SCHEDULER_KEY_HINTS),
+    ("steps", STEPS_KEY_HINTS),
+    ("cfg_scale", CFG_KEY_HINTS),
+    ("seed", SEED_KEY_HINTS),
+    ("width", WIDTH_KEY_HINTS),
+    ("height", HEIGHT_KEY_HINTS),
+)
+_NUM_FIELD_ORDER = (
+    ("steps", STEPS_KEY_HINTS),
+    ("seed", SEED_KEY_HINTS),
+    ("width", WIDTH_KEY_HINTS),
+    ("height", HEIGHT_KEY_HINTS),
+    ("cfg_scale", CFG_KEY_HINTS),
+)
+_INT_FIELDS = frozenset({"steps", "seed", "width", "height"})
+
+
+@functools.lru_cache(maxsize=4096)
+def _keyed_field_plan(k: Any) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Resolve an EXIF key to the fields it may fill: (for str values, for numbers).
+
+    Key names repeat across records, so the hint scans run once per distinct key
+    and extract_keyed_fields does a single cached lookup per key.
+    "cfg_config" marks a cfg-looking "config" key that claims but never fills cfg_scale.
+    """
+    lk = _lower_key(k)
+    if "workflow" in lk:
+        return (), ()
+
+    str_plan: List[str] = []
+    for field, hints in _STR_FIELD_ORDER:
+        if not _key_has_any(lk, hints):
+            continue
+        if field == "negative_prompt" and "prompt" not in lk:
+            continue
+        if field == "model" and _is_camera_model_key(lk):
+            continue
+        if field == "cfg_scale" and "config" in lk:
+            field = "cfg_config"
+        str_plan.append(field)
+
+    num_plan = tuple(
+        field
+        for field, hints in _NUM_FIELD_ORDER
+        if _key_has_any(lk, hints) and not (field == "cfg_scale" and "config" in lk)
+    )
+    return tuple(str_plan), num_plan
+
+
 def extract_keyed_fields(exif_obj: Dict[str, Any]) -> Dict[str, Any]:
     """
     Extract direct field values from EXIF keys (not just A1111 blocks).
@@ -1108,74 +1639,45 @@ def extract_keyed_fields(exif_obj: Dict[str, Any]) -> Dict[str, Any]:
     for k, v in exif_obj.items():
         if v in (None, ""):
             continue
-        lk = str(k).lower()
-        if "workflow" in lk:
-            continue
+        str_plan, num_plan = _keyed_field_plan(k)
 
         if isinstance(v, str):
-            if _key_has_any(lk, NEG_PROMPT_KEY_HINTS) and "prompt" in lk:
-                neg_candidates.append(v)
-                continue
-            if _key_has_any(lk, PROMPT_KEY_HINTS):
-                pos_candidates.append(v)
-                continue
-
-            if _key_has_any(lk, MODEL_KEY_HINTS) and not _is_camera_model_key(lk):
-                if "model" not in out:
-                    out["model"] = clean_ws(v)
-                continue
-
-            if _key_has_any(lk, SAMPLER_KEY_HINTS) and "sampler" not in out:
-                out["sampler"] = clean_ws(v)
-                continue
-
-            if _key_has_any(lk, SCHEDULER_KEY_HINTS) and "scheduler" not in out:
-                out["scheduler"] = clean_ws(v)
-                continue
-
-            if _key_has_any(lk, STEPS_KEY_HINTS) and "steps" not in out:
-                steps = _to_int(v)
-                if steps is not None:
-                    out["steps"] = steps
-                continue
-
-            if _key_has_any(lk, CFG_KEY_HINTS) and "cfg_scale" not in out:
-                if "config" not in lk:
-                    cfg = _to_float(v)
-                    if cfg is not None:
-                        out["cfg_scale"] = cfg
-                continue
-
-            if _key_has_any(lk, SEED_KEY_HINTS) and "seed" not in out:
-                seed = _to_int(v)
-                if seed is not None:
-                    out["seed"] = seed
-                continue
-
-            if _key_has_any(lk, WIDTH_KEY_HINTS) and "width" not in out:
-                width = _to_int(v)
-                if width is not None:
-                    out["width"] = width
-                continue
-
-            if _key_has_any(lk, HEIGHT_KEY_HINTS) and "height" not in out:
-                height = _to_int(v)
-                if height is not None:
-                    out["height"] = height
-                continue
-
-        elif isinstance(v, (int, float)):
-            if _key_has_any(lk, STEPS_KEY_HINTS) and "steps" not in out:
-                out["steps"] = int(v)
-            if _key_has_any(lk, SEED_KEY_HINTS) and "seed" not in out:
-                out["seed"] = int(v)
-            if _key_has_any(lk, WIDTH_KEY_HINTS) and "width" not in out:
-                out["width"] = int(v)
-            if _key_has_any(lk, HEIGHT_KEY_HINTS) and "height" not in out:
-                out["height"] = int(v)
-            if _key_has_any(lk, CFG_KEY_HINTS) and "cfg_scale" not in out:
-                if "config" not in lk:
-                    out["cfg_scale"] = float(v)
+            for field in str_plan:
+                if field == "negative_prompt":
+                    if v.strip():
+                        neg_candidates.append(clean_ws(v))
+                    break
+                if field == "prompt":
+                    if v.strip():
+                        pos_candidates.append(clean_ws(v))
+                    break
+                if field == "model":
+                    if "model" not in out:
+                        out["model"] = sys.intern(clean_ws(v))
+                    break
+                if field == "cfg_config":
+                    if "cfg_scale" in out:
+                        continue
+                    break
+                if field in out:
+                    continue
+                if field in _INT_FIELDS:
+                    num = _to_int(v)
+                elif field == "cfg_scale":
+                    num = _to_float(v)
+                else:
+                    # sampler/scheduler: small vocabulary repeated in every record.
+                    out[field] = sys.intern(clean_ws(v))
+                    break
+                if num is not None:
+                    out[field] = num
+                break
+
+        elif isinstance(v, (int, float)) and type(v) is not bool:
+            # bool is an int subclass; True is a flag, not cfg 1.0 (as in _to_int/_to_float).
+            for field in num_plan:
+                if field not in out:
+                    out[field] = float(v) if field == "cfg_scale" else int(v)
 
     pos = _best_prompt_candidate(pos_candidates)
     neg = _best_prompt_candidate(neg_candidates)
@@ -1209,38 +1711,83 @@ def merge_record_lists(
     new_records: List[Dict[str, Any]],
     old_records: List[Dict[str, Any]],
 ) -> List[Dict[str, Any]]:
-    old_by_key = {record_key(r): r for r in old_records if record_key(r)}
-    old_by_name = {}
+    # record_key runs once per record; it is only recomputed after a merge,
+    # which can fill in a missing source_file/file_name.
+    old_by_key: Dict[str, Dict[str, Any]] = {}
     for r in old_records:
-        name = r.get("file_name")
-        if name and name not in old_by_name:
-            old_by_name[name] = r
-
+        key = record_key(r)
+        if key:
+            old_by_key[key] = r
+
+    # The file_name fallback index is only built if some key lookup misses,
+    # which on a plain re-run is never.
+    old_by_name: Optional[Dict[str, Dict[str, Any]]] = None
+    new_keys = set()
     for rec in new_records:
         key = record_key(rec)
-        old = old_by_key.get(key) or old_by_name.get(rec.get("file_name"))
+        old = old_by_key.get(key)
+        if not old:
+            if old_by_name is None:
+                old_by_name = {}
+                for r in old_records:
+                    name = r.get("file_name")
+                    if name and name not in old_by_name:
+                        old_by_name[name] = r
+            old = old_by_name.get(rec.get("file_name"))
         if old:
             merge_missing_values(rec, old)
+            key = record_key(rec)
+        if key:
+            new_keys.add(key)
 
-    new_keys = {record_key(r) for r in new_records if record_key(r)}
     missing = [r for k, r in old_by_key.items() if k not in new_keys]
     return new_records + missing
 
 
-def compute_csv_columns(records: List[Dict[str, Any]]) -> List[str]:
-    extra = sorted({k for r in records for k in r.keys()} - set(CSV_COLUMNS) - {"kv", "resources", "workflow_json", "raw_text_preview"})
-    return CSV_COLUMNS + extra
+CSV_SKIP_COLUMNS = frozenset({"kv", "resources", "workflow_json", "raw_text_preview"})
+
+
+def compute_csv_columns(records: Iterable[Dict[str, Any]]) -> List[str]:
+    seen = set(CSV_COLUMNS) | CSV_SKIP_COLUMNS
+    extra: List[str] = []
+    for r in records:
+        for k in r:
+            if k not in seen:
+                seen.add(k)
+                extra.append(k)
+    return CSV_COLUMNS + sorted(extra)
+
+
+def load_csv_records(csv_path: str) -> List[Dict[str, Any]]:
+    """
+    Read a records CSV into dicts with csv.reader and one zip per row.
+    Matches DictReader for well-formed files: blank rows skipped, short rows padded with None.
+    """
+    with open(csv_path, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return []
+        n = len(header)
+        out: List[Dict[str, Any]] = []
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < n:
+                row += [None] * (n - len(row))
+            out.append(dict(zip(header, row)))
+    return out
 
 
 def write_csv(csv_path: str, records: List[Dict[str, Any]], columns: Optional[List[str]] = None) -> None:
     os.makedirs(os.path.dirname(csv_path), exist_ok=True)
     cols = columns or CSV_COLUMNS
     with open(csv_path, "w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=cols)
-        w.writeheader()
-        for r in records:
-            row = {c: r.get(c) for c in cols}
-            w.writerow(row)
+        # Plain csv.writer: rows are built positionally, no per-row DictWriter bookkeeping.
+        # map(r.get, cols) runs the per-column lookups in C.
+        w = csv.writer(f)
+        w.writerow(cols)
+        w.writerows(list(map(r.get, cols)) for r in records)
 
 
 def main():
@@ -1260,40 +1807,47 @@ def main():
 
     init_db(str(db_path), str(schema_path))
 
-    records: List[Dict[str, Any]] = []
     os.makedirs(os.path.dirname(out_jsonl), exist_ok=True)
 
-    with open(in_jsonl, "r", encoding="utf-8-sig") as f_in, sqlite3.connect(db_path) as conn:
+    exif_objs = read_exif_jsonl(str(in_jsonl))
 
-        conn.execute("PRAGMA foreign_keys=ON;")
+    # Reuse stored digests for files whose (size, mtime_ns) is unchanged and
+    # hash the rest up front in parallel instead of inline per record.
+    src_pairs = [source_paths(o) for o in exif_objs]
+    stats = stat_paths(abs_path for _rel, abs_path in src_pairs)
+    conn = connect_db(str(db_path))
+    try:
+        known = load_file_fingerprints(conn)
+        digests = cached_digests(src_pairs, stats, known)
+        digests.update(prehash_paths(p for p in stats if p not in digests))
+        fingerprints = {rel: stats[abs_path] for rel, abs_path in src_pairs if abs_path in stats}
 
-        for line in f_in:
-            line = line.strip()
-            if not line:
-                continue
-            line = line.lstrip("\ufeff")
-            exif_obj = json.loads(line)
-            rec = normalize_record(exif_obj)
-            upsert_record(conn, rec)
-            records.append(rec)
+        records = normalize_records(exif_objs, digests)
 
-        conn.commit()
+        # upsert_records writes everything in a single transaction.
+        upsert_records(conn, records, fingerprints)
+    finally:
+        conn.close()
 
-    old_csv_records: List[Dict[str, Any]] = []
-    if out_csv.exists():
-        with open(out_csv, "r", encoding="utf-8") as f_old:
-            old_csv_records = list(csv.DictReader(f_old))
+    old_csv_records = load_csv_records(str(out_csv)) if out_csv.exists() else []
 
-    old_jsonl_records = load_jsonl(str(out_jsonl))
+    old_jsonl_lines = load_jsonl_lines(str(out_jsonl))
+    old_jsonl_records = [rec for rec, _line in old_jsonl_lines]
 
+    # JSONL and CSV merge against different old sources (the CSV may carry
+    # user-edited columns), so they stay separate merges. Only the JSONL side
+    # needs copies: `records` is not used again after the CSV merge.
     merged_jsonl = merge_record_lists([dict(r) for r in records], old_jsonl_records)
-    merged_csv = merge_record_lists([dict(r) for r in records], old_csv_records)
 
-    columns = compute_csv_columns(old_csv_records + merged_csv)
+    # Old records that no new record matched come back from the merge
+    # untouched (merge_missing_values only fills the new side), so their
+    # original line is written as-is rather than re-encoded.
+    raw_by_id = {id(rec): line for rec, line in old_jsonl_lines}
+    write_jsonl(str(out_jsonl), (raw_by_id.get(id(r), r) for r in merged_jsonl))
+    del merged_jsonl, old_jsonl_records, old_jsonl_lines, raw_by_id
 
-    with open(out_jsonl, "w", encoding="utf-8") as f_out:
-        for rec in merged_jsonl:
-            f_out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    merged_csv = merge_record_lists(records, old_csv_records)
+    columns = compute_csv_columns(itertools.chain(old_csv_records, merged_csv))
 
     write_csv(str(out_csv), merged_csv, columns)
     print(f"Done.\nDB: {db_path}\nJSONL: {out_jsonl}\nCSV: {out_csv}\nRecords: {len(merged_csv)}")
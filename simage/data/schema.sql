@@ -18,7 +18,9 @@ CREATE TABLE IF NOT EXISTS images (
   imported_utc TEXT,
   sha256 TEXT,
   format_hint TEXT,
-  raw_text_preview TEXT
+  raw_text_preview TEXT,
+  size INTEGER,               -- file size in bytes when sha256 was computed
+  mtime_ns INTEGER            -- file mtime (ns) when sha256 was computed
 );
 
 CREATE TABLE IF NOT EXISTS kv (
@@ -3,18 +3,23 @@ Simage UI entrypoint.
 A fast, multi-tab image pipeline UI for the Simage project.
 """
 
+import contextlib
 import csv
-import json
+import functools
 import os
 import sys
+from collections import Counter
+from operator import itemgetter
 
 from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QApplication, QMainWindow, QSizePolicy, QTabWidget
+from PySide6.QtWidgets import QApplication, QMainWindow, QSizePolicy, QTabWidget, QWidget
 
+from simage.utils import jsonio
 from simage.utils.paths import resolve_repo_path
 from .gallery import GalleryTab
 from .edit import EditTab
 from .batch import BatchTab
+from .csv_edit import replace_csv
 from .settings import SettingsTab
 from .viewer import ViewerTab
 from .db_viewer import DatabaseViewerTab
@@ -32,6 +37,9 @@ from .theme import (
 )
 
 class SimageUIMain(QMainWindow):
+    # Tabs fed by the gallery's image selection.
+    SELECTION_TABS = ("tag", "edit", "batch")
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Simage Image Pipeline UI")
@@ -40,23 +48,71 @@ class SimageUIMain(QMainWindow):
         self.setCentralWidget(self.tabs)
         self.tabs.setTabsClosable(False)
         self.tabs.setMovable(True)
-        gallery_tab = GalleryTab(self)
-        batch_tab = BatchTab(self, gallery_tab)
-        tag_tab = TagTab(self)
-        edit_tab = EditTab(self)
-        gallery_tab.grid.images_selected.connect(batch_tab.set_selected_images)
-        gallery_tab.grid.images_selected.connect(tag_tab.set_selected_images)
-        gallery_tab.grid.images_selected.connect(edit_tab.set_selected_images)
-        self.tabs.addTab(gallery_tab, "Gallery & Search")
-        self.tabs.addTab(tag_tab, "Tag Images")
-        self.tabs.addTab(edit_tab, "Edit Images")
-        self.tabs.addTab(batch_tab, "Batch Processing")
-        self.tabs.addTab(SettingsTab(self, gallery_tab, batch_tab), "Settings")
-        self.tabs.addTab(ViewerTab(self), "Full Image Viewer")
-        self.tabs.addTab(DatabaseViewerTab(self), "DB Viewer")
+        self.gallery_tab = GalleryTab(self)
+        self.gallery_tab.grid.images_selected.connect(self._on_images_selected)
+        self.tabs.addTab(self.gallery_tab, "Gallery & Search")
+        # Every other tab starts as an empty placeholder and is built the first
+        # time it is shown (or needed by another tab).
+        self._tab_specs = {
+            "tag": ("Tag Images", lambda: TagTab(self)),
+            "edit": ("Edit Images", lambda: EditTab(self)),
+            "batch": ("Batch Processing", lambda: BatchTab(self, self.gallery_tab)),
+            "settings": (
+                "Settings",
+                lambda: SettingsTab(self, self.gallery_tab, self._materialize_tab("batch")),
+            ),
+            "viewer": ("Full Image Viewer", lambda: ViewerTab(self)),
+            "db": ("DB Viewer", lambda: DatabaseViewerTab(self)),
+        }
+        self._built_tabs = {}
+        self._placeholders = {}
+        self._selected_paths = []
+        for key, (title, _factory) in self._tab_specs.items():
+            placeholder = QWidget()
+            self._placeholders[key] = placeholder
+            self.tabs.addTab(placeholder, title)
+        self.tabs.currentChanged.connect(self._on_tab_changed)
         self._allow_minimum_window_size()
         self._restore_window_geometry()
 
+    def _on_tab_changed(self, index: int) -> None:
+        for key, placeholder in list(self._placeholders.items()):
+            if self.tabs.indexOf(placeholder) == index:
+                self._materialize_tab(key)
+                break
+
+    def _materialize_tab(self, key: str):
+        tab = self._built_tabs.get(key)
+        if tab is not None:
+            return tab
+        title, factory = self._tab_specs[key]
+        tab = factory()
+        self._built_tabs[key] = tab
+        self._relax_size_policy(tab)
+        placeholder = self._placeholders.pop(key)
+        # Tabs are movable, so look the placeholder up rather than trusting its original index.
+        index = self.tabs.indexOf(placeholder)
+        current = self.tabs.currentIndex()
+        self.tabs.blockSignals(True)
+        try:
+            self.tabs.removeTab(index)
+            self.tabs.insertTab(index, tab, title)
+            self.tabs.setCurrentIndex(current)
+        finally:
+            self.tabs.blockSignals(False)
+        placeholder.deleteLater()
+        if key in self.SELECTION_TABS and self._selected_paths:
+            tab.set_selected_images(self._selected_paths)
+        return tab
+
+    def _on_images_selected(self, image_paths) -> None:
+        # Remembered so tabs built later start from the current selection.
+        self._selected_paths = list(image_paths)
+        for key in self.SELECTION_TABS:
+            tab = self._built_tabs.get(key)
+            if tab is not None:
+                tab.set_selected_images(self._selected_paths)
+
     def closeEvent(self, event):
         save_window_geometry("main", self.saveGeometry())
         super().closeEvent(event)
@@ -73,8 +129,11 @@ class SimageUIMain(QMainWindow):
         for idx in range(self.tabs.count()):
             widget = self.tabs.widget(idx)
             if widget:
-                widget.setMinimumSize(0, 0)
-                widget.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+                self._relax_size_policy(widget)
+
+    def _relax_size_policy(self, widget) -> None:
+        widget.setMinimumSize(0, 0)
+        widget.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
 
 
 # --- TagTab implementation ---
@@ -83,6 +142,7 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
     QLabel,
     QPushButton,
+    QListView,
     QListWidget,
     QHBoxLayout,
     QLineEdit,
@@ -94,26 +154,139 @@ from PySide6.QtWidgets import (
     QToolButton,
     QTabWidget,
 )
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QItemSelection,
+    QItemSelectionModel,
+    QModelIndex,
+    QMutex,
+    QObject,
+    QRunnable,
+    QThreadPool,
+    QTimer,
+    Signal,
+)
+
+# Columns TagTab reads and rewrites; everything else in records.csv is carried through untouched.
+TAG_CSV_COLUMNS = ("file_name", "prompt")
+TAG_TAB_INFO = "Manage tags and apply them to selected images."
+
+
+@functools.lru_cache(maxsize=4096)
+def _split_prompt_tags(text):
+    """Split a prompt on commas/newlines into stripped, interned tags."""
+    # replace+split beats both a compiled [,\n]+ split and str.translate here.
+    return tuple(sys.intern(p) for p in map(str.strip, text.replace("\n", ",").split(",")) if p)
+
+
+def _write_records_csv(csv_path, fieldnames, file_names, prompts, extra_rows):
+    """Write TagTab's columns back to records.csv through ``replace_csv``."""
+    extra_fields = [f for f in fieldnames if f not in TAG_CSV_COLUMNS]
+    # Rows are rebuilt as (file_name, prompt, *extras) and put back into
+    # header order in one itemgetter call.
+    positions = {"file_name": 0, "prompt": 1}
+    positions.update((f, i + 2) for i, f in enumerate(extra_fields))
+    reorder = itemgetter(*(positions[f] for f in fieldnames))
+    with replace_csv(csv_path) as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows(
+            map(reorder, ((name, prompt) + extras for name, prompt, extras in zip(file_names, prompts, extra_rows)))
+        )
+
+
+class _StringListModel(QAbstractListModel):
+    """Read-only list model over a Python list of strings.
+
+    ``set_items`` swaps the list in under a model reset, so a refresh costs the
+    same for ten rows or a hundred thousand; only visible rows are ever asked for.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self._items[index.row()]
+        return None
+
+    def items(self):
+        return self._items
+
+    def set_items(self, items):
+        # Callers hand over lists they no longer mutate, so no copy is taken.
+        self.beginResetModel()
+        self._items = items
+        self.endResetModel()
+
+
+class _CsvSaveSignals(QObject):
+    # (ok, error message); emitted exactly once per task.
+    finished = Signal(bool, str)
+
+
+class _CsvSaveTask(QRunnable):
+    """Writes a snapshot of TagTab's records on a pool thread."""
+
+    # Saves never overlap, even if a second one is started before the first ends.
+    _lock = QMutex()
+
+    def __init__(self, csv_path, fieldnames, file_names, prompts, extra_rows):
+        super().__init__()
+        self.signals = _CsvSaveSignals()
+        self._args = (csv_path, fieldnames, file_names, prompts, extra_rows)
+
+    def run(self):
+        error = "save did not complete"
+        self._lock.lock()
+        try:
+            _write_records_csv(*self._args)
+            error = ""
+        except Exception as exc:
+            # Any failure must reach the UI thread, or the save buttons stay disabled.
+            error = f"{type(exc).__name__}: {exc}"
+        finally:
+            self._lock.unlock()
+            self.signals.finished.emit(not error, error)
+
 
 class TagTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.csv_path = str(resolve_repo_path("out/records.csv", must_exist=False, allow_absolute=False))
         self.custom_tags_path = str(resolve_repo_path("out/tag_list.json", must_exist=False, allow_absolute=False))
-        self.records, self.fieldnames = self._load_records()
-        self.record_by_name = {r.get("file_name"): r for r in self.records if r.get("file_name")}
+        self._read_records()
+        # Lowercase tag -> number of selected files carrying it, and the spelling shown for it.
+        self._current_tag_counts = Counter()
+        self._current_tag_spelling = {}
         self.custom_tags = self._load_custom_tags()
+        # Kept in step with custom_tags on every change so refresh/save need not re-sort.
+        self._custom_tags_sorted = sorted(self.custom_tags)
         self.selected_files = []
         self.pending_new_tags = []
         self.pending_add_tags = []
         self.pending_edits = {}
+        self._save_task = None
+        self._batching = 0
+        self._refresh_pending = set()
+        # Image list selection flips (file_name -> net +1/-1) not yet counted;
+        # a drag or shift-click burst is folded in once the timer fires.
+        self._selection_delta = Counter()
+        self._selection_timer = QTimer(self)
+        self._selection_timer.setSingleShot(True)
+        self._selection_timer.setInterval(50)
+        self._selection_timer.timeout.connect(self._flush_selection_change)
 
         layout = QVBoxLayout(self)
         self.setLayout(layout)
         self._apply_page_layout(layout)
 
         # Header with info
-        self.info_label = QLabel("Manage tags and apply them to selected images.")
+        self.info_label = QLabel(TAG_TAB_INFO)
         info_row = QHBoxLayout()
         info_row.addWidget(self.info_label)
         info_row.addWidget(
@@ -145,9 +318,9 @@ class TagTab(QWidget):
                 "All images from records.csv. Select images to view or edit tags.",
             )
         )
-        self.image_list = QListWidget()
-        self.image_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
-        self.image_list.itemSelectionChanged.connect(self._on_image_selection_changed)
+        # Model-backed views for the long lists: a refresh is one model reset.
+        self.image_list, self._image_model = self._string_list_view(QAbstractItemView.ExtendedSelection)
+        self.image_list.selectionModel().selectionChanged.connect(self._on_image_selection_changed)
         image_layout.addWidget(self.image_list)
         top_layout.addWidget(image_panel)
 
@@ -162,7 +335,7 @@ class TagTab(QWidget):
                 "Tags currently assigned to the selected images.",
             )
         )
-        self.current_tags_list = QListWidget()
+        self.current_tags_list = self._tune_list_view(QListWidget())
         current_layout.addWidget(self.current_tags_list)
         top_layout.addWidget(current_panel)
 
@@ -196,7 +369,7 @@ class TagTab(QWidget):
         self.add_new_tag_btn.clicked.connect(self._queue_new_tag)
         new_layout.addWidget(self.add_new_tag_btn)
         new_layout.addWidget(QLabel("Pending new tags:"))
-        self.new_tags_list = QListWidget()
+        self.new_tags_list = self._tune_list_view(QListWidget())
         new_layout.addWidget(self.new_tags_list)
         self.save_new_tags_btn = QPushButton("Save New Tags to List")
         self.save_new_tags_btn.clicked.connect(self._save_new_tags)
@@ -214,7 +387,7 @@ class TagTab(QWidget):
                 "Saved custom tags available for filtering and tagging.",
             )
         )
-        self.custom_tags_list = QListWidget()
+        self.custom_tags_list, self._custom_tags_model = self._string_list_view(QAbstractItemView.SingleSelection)
         custom_layout.addWidget(self.custom_tags_list)
         create_add_layout.addWidget(custom_panel)
 
@@ -229,14 +402,13 @@ class TagTab(QWidget):
                 "Choose tags to apply to selected images.",
             )
         )
-        self.add_tag_list = QListWidget()
-        self.add_tag_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.add_tag_list, self._add_tag_model = self._string_list_view(QAbstractItemView.ExtendedSelection)
         add_layout.addWidget(self.add_tag_list)
         self.queue_add_btn = QPushButton("Queue Selected Tags")
         self.queue_add_btn.clicked.connect(self._queue_add_tags)
         add_layout.addWidget(self.queue_add_btn)
         add_layout.addWidget(QLabel("Tags queued to apply:"))
-        self.added_tags_list = QListWidget()
+        self.added_tags_list = self._tune_list_view(QListWidget())
         add_layout.addWidget(self.added_tags_list)
         self.clear_added_btn = QPushButton("Clear Queued Tags")
         self.clear_added_btn.clicked.connect(self._clear_added_tags)
@@ -267,8 +439,7 @@ class TagTab(QWidget):
             )
         )
         edit_panel_layout.addWidget(QLabel("Select tag to rename:"))
-        self.edit_tag_list = QListWidget()
-        self.edit_tag_list.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.edit_tag_list, self._edit_tag_model = self._string_list_view(QAbstractItemView.SingleSelection)
         edit_panel_layout.addWidget(self.edit_tag_list)
         self.edit_tag_input = QLineEdit()
         self.edit_tag_input.setPlaceholderText("New tag name")
@@ -289,7 +460,7 @@ class TagTab(QWidget):
                 "Tag renames pending save.",
             )
         )
-        self.edited_tags_list = QListWidget()
+        self.edited_tags_list = self._tune_list_view(QListWidget())
         pending_edit_layout.addWidget(self.edited_tags_list)
         self.save_edits_btn = QPushButton("Save Tag Renames")
         self.save_edits_btn.setStyleSheet("QPushButton { background-color: #2196F3; color: white; font-weight: bold; padding: 8px; }")
@@ -310,7 +481,7 @@ class TagTab(QWidget):
                 "Images that will receive any queued tags.",
             )
         )
-        self.selected_images_list = QListWidget()
+        self.selected_images_list = self._tune_list_view(QListWidget())
         selected_layout.addWidget(self.selected_images_list)
         operations_tab.addTab(selected_widget, "Selected Images")
 
@@ -325,8 +496,9 @@ class TagTab(QWidget):
         if saved_sizes and len(saved_sizes) == 2:
             main_splitter.setSizes(saved_sizes)
 
-        self._refresh_image_list()
-        self._refresh_tag_lists()
+        with self._batch():
+            self._request_refresh("images")
+            self._request_refresh("tags")
 
     def _help_button(self, text):
         btn = QToolButton()
@@ -358,38 +530,118 @@ class TagTab(QWidget):
         return widget
 
     def _load_records(self):
+        """Read records.csv column-major.
+
+        Returns ``(fieldnames, file_names, prompts, extra_rows)``. Only the two
+        columns this tab works with get their own lists; every other column is
+        kept as one tuple per row so ``_save_records`` can write it back as-is.
+        """
         if not os.path.exists(self.csv_path):
-            return [], []
+            return list(TAG_CSV_COLUMNS), [], [], []
         with open(self.csv_path, "r", encoding="utf-8", newline="") as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-            return rows, reader.fieldnames or []
+            reader = csv.reader(f)
+            fieldnames = next(reader, [])
+            for col in TAG_CSV_COLUMNS:
+                if col not in fieldnames:
+                    fieldnames.append(col)
+            width = len(fieldnames)
+            name_idx = fieldnames.index("file_name")
+            prompt_idx = fieldnames.index("prompt")
+            extra_idx = [i for i in range(width) if i != name_idx and i != prompt_idx]
+            take = itemgetter(name_idx, prompt_idx, *extra_idx)
+            file_names, prompts, extra_rows = [], [], []
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) < width:
+                    row += [""] * (width - len(row))
+                values = take(row)
+                file_names.append(values[0])
+                prompts.append(values[1])
+                extra_rows.append(values[2:])
+        return fieldnames, file_names, prompts, extra_rows
+
+    def _index_records(self):
+        # zip/range keeps the build in C; rows without a file name are dropped afterwards.
+        index = dict(zip(self.file_names, range(len(self.file_names))))
+        index.pop("", None)
+        return index
+
+    def _csv_stamp(self):
+        try:
+            st = os.stat(self.csv_path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _read_records(self):
+        """Load records.csv and reset every cache derived from it."""
+        self.fieldnames, self.file_names, self.prompts, self.extra_rows = self._load_records()
+        # Size and mtime of the file as last read or written by this tab.
+        self._loaded_stamp = self._csv_stamp()
+        self.record_by_name = self._index_records()
+        # File names only change on reload, so the image list order is computed once.
+        self._sorted_image_names = sorted(self.record_by_name)
+        # file_name -> its row in the image list, for selecting without a sweep.
+        self._image_rows = {name: row for row, name in enumerate(self._sorted_image_names)}
+        # file_name -> deduped tags of its prompt, filled lazily and dropped when the prompt changes.
+        self._tags_by_name = {}
+        # Lowercase tag -> first spelling across all prompts; None until first needed.
+        self._record_tag_map = None
+        # Lowercase tag -> indices of the rows whose prompt carries it; built on first rename.
+        self._records_by_tag = None
+
+    def _reload_if_changed(self):
+        # Edits are written from memory, so only another tab or tool touching
+        # records.csv (ingest, batch rename) makes a re-read necessary.
+        if self._save_task is not None or self._csv_stamp() == self._loaded_stamp:
+            return
+        self._flush_selection_change()
+        self._read_records()
+        with self._batch():
+            self._request_refresh("images")
+            self._request_refresh("tags")
+        # Re-select after the image list is rebuilt; names gone from the file drop out.
+        self.set_selected_images(self.selected_files)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._reload_if_changed()
 
     def _save_records(self):
-        if not self.fieldnames:
-            fieldnames = sorted({k for r in self.records for k in r.keys()})
+        # Snapshot on the UI thread so later edits cannot race the writer.
+        task = _CsvSaveTask(
+            self.csv_path,
+            list(self.fieldnames),
+            list(self.file_names),
+            list(self.prompts),
+            list(self.extra_rows),
+        )
+        task.signals.finished.connect(self._on_records_saved)
+        self._save_task = task
+        self._set_saving(True)
+        QThreadPool.globalInstance().start(task)
+
+    def _set_saving(self, saving):
+        self.apply_tags_btn.setEnabled(not saving)
+        self.save_edits_btn.setEnabled(not saving)
+        self.info_label.setText("Saving records.csv..." if saving else TAG_TAB_INFO)
+
+    def _on_records_saved(self, ok, error=""):
+        self._save_task = None
+        self._set_saving(False)
+        if ok:
+            self._loaded_stamp = self._csv_stamp()
         else:
-            fieldnames = list(self.fieldnames)
-        backup_path = self.csv_path + ".bak"
-        if os.path.exists(self.csv_path):
-            if not os.path.exists(backup_path):
-                os.replace(self.csv_path, backup_path)
-            else:
-                os.remove(self.csv_path)
-                os.replace(backup_path, self.csv_path)
-                os.replace(self.csv_path, backup_path)
-        with open(self.csv_path, "w", encoding="utf-8", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in self.records:
-                writer.writerow(row)
+            QMessageBox.warning(self, "Save Failed", f"Could not write {self.csv_path}.\n\n{error}")
 
     def _load_custom_tags(self):
         if not os.path.exists(self.custom_tags_path):
             return set()
         try:
-            with open(self.custom_tags_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            with open(self.custom_tags_path, "rb") as f:
+                raw = f.read()
+            data = jsonio.loads(raw)
             if isinstance(data, list):
                 return set(str(t).strip() for t in data if str(t).strip())
         except Exception:
@@ -398,111 +650,281 @@ class TagTab(QWidget):
 
     def _save_custom_tags(self):
         os.makedirs(os.path.dirname(self.custom_tags_path), exist_ok=True)
-        with open(self.custom_tags_path, "w", encoding="utf-8") as f:
-            json.dump(sorted(self.custom_tags), f, indent=2, ensure_ascii=False)
+        with open(self.custom_tags_path, "wb") as f:
+            f.write(jsonio.dumps(self._custom_tags_sorted, indent=True))
 
     def _split_tags(self, text):
         if not text:
             return []
-        s = str(text).replace("\n", ",")
-        parts = [p.strip() for p in s.split(",")]
-        return [p for p in parts if p]
+        return list(_split_prompt_tags(str(text)))
 
     def _dedupe_tags(self, tags):
-        seen = set()
-        out = []
+        # Insertion-ordered dict: one hash lookup per tag, first spelling kept.
+        out = {}
         for t in tags:
-            key = t.lower()
-            if key in seen:
-                continue
-            seen.add(key)
-            out.append(t)
-        return out
+            out.setdefault(t.lower(), t)
+        return list(out.values())
 
     def _collect_tag_map(self):
-        tag_map = {}
-        for rec in self.records:
-            prompt = rec.get("prompt", "")
-            for tag in self._split_tags(prompt):
-                key = tag.lower()
-                if key not in tag_map:
-                    tag_map[key] = tag
+        if self._record_tag_map is None:
+            record_map = {}
+            for prompt in self.prompts:
+                for tag in self._split_tags(prompt):
+                    key = tag.lower()
+                    if key not in record_map:
+                        record_map[key] = tag
+            self._record_tag_map = record_map
+        # Custom tags only fill keys no prompt uses, so they are layered on per call.
+        tag_map = dict(self._record_tag_map)
         for tag in self.custom_tags:
             key = tag.lower()
             if key not in tag_map:
                 tag_map[key] = tag
         return tag_map
 
+    def _string_list_view(self, selection_mode):
+        view = self._tune_list_view(QListView())
+        model = _StringListModel(view)
+        view.setModel(model)
+        view.setSelectionMode(selection_mode)
+        view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        return view, model
+
+    def _tune_list_view(self, view):
+        # Every row is one line of text, so Qt can size them all from the first
+        # one and lay out long lists in batches instead of measuring each item.
+        view.setUniformItemSizes(True)
+        view.setLayoutMode(QListView.Batched)
+        view.setBatchSize(256)
+        view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        return view
+
+    def _selected_strings(self, view):
+        return [index.data() for index in view.selectionModel().selectedIndexes()]
+
+    def _fill_list(self, widget, items):
+        """Replace a list widget's contents in one addItems call with repaints and signals held off."""
+        widget.setUpdatesEnabled(False)
+        widget.blockSignals(True)
+        try:
+            widget.clear()
+            widget.addItems(list(items))
+        finally:
+            widget.blockSignals(False)
+            widget.setUpdatesEnabled(True)
+            widget.viewport().update()
+
+    # Refresh names in the order a batch flushes them; "tags" requests current/queued itself.
+    REFRESH_METHODS = {
+        "images": "_refresh_image_list",
+        "tags": "_refresh_tag_lists",
+        "current": "_refresh_current_tags",
+        "queued": "_refresh_queued_tags_lists",
+        "selected": "_refresh_selected_images_list",
+    }
+
+    @contextlib.contextmanager
+    def _batch(self):
+        """Collect refresh requests and run each distinct one once when the outermost batch ends."""
+        self._batching += 1
+        try:
+            yield
+        finally:
+            if self._batching == 1:
+                # Still batching while flushing, so refreshes requested by a
+                # refresh join the queue instead of running twice.
+                while self._refresh_pending:
+                    name = next(n for n in self.REFRESH_METHODS if n in self._refresh_pending)
+                    self._refresh_pending.discard(name)
+                    getattr(self, self.REFRESH_METHODS[name])()
+            self._batching -= 1
+
+    def _request_refresh(self, name):
+        if self._batching:
+            self._refresh_pending.add(name)
+        else:
+            getattr(self, self.REFRESH_METHODS[name])()
+
     def _refresh_image_list(self):
-        self.image_list.blockSignals(True)
-        self.image_list.clear()
-        names = sorted(self.record_by_name.keys())
-        for name in names:
-            self.image_list.addItem(name)
-        self.image_list.blockSignals(False)
+        selection = self.image_list.selectionModel()
+        selection.blockSignals(True)
+        try:
+            self._image_model.set_items(self._sorted_image_names)
+        finally:
+            selection.blockSignals(False)
 
     def _refresh_tag_lists(self):
         tag_map = self._collect_tag_map()
         all_tags = [tag_map[k] for k in sorted(tag_map.keys())]
 
-        self.add_tag_list.clear()
-        self.edit_tag_list.clear()
-        for tag in all_tags:
-            self.add_tag_list.addItem(tag)
-            self.edit_tag_list.addItem(tag)
+        self._add_tag_model.set_items(all_tags)
+        self._edit_tag_model.set_items(all_tags)
+        self._custom_tags_model.set_items(self._custom_tags_sorted)
 
-        self.custom_tags_list.clear()
-        for tag in sorted(self.custom_tags):
-            self.custom_tags_list.addItem(tag)
+        self._request_refresh("current")
+        self._request_refresh("queued")
 
-        self._refresh_current_tags()
-        self._refresh_pending_lists()
+    def _merge_into_tag_map(self, tags):
+        """Add tags just written into prompts to the cached tag map.
+
+        New keys are added in place. A second spelling of a known key may change
+        which spelling comes first, so that falls back to a rebuild.
+        """
+        record_map = self._record_tag_map
+        if record_map is None:
+            return
+        for text in tags:
+            # A queued tag may itself contain commas; key what the prompt will split into.
+            for tag in self._split_tags(text):
+                if record_map.setdefault(tag.lower(), tag) != tag:
+                    self._record_tag_map = None
+                    return
+
+    def _record_tags(self, name):
+        tags = self._tags_by_name.get(name)
+        if tags is None:
+            tags = tuple(self._dedupe_tags(self._split_tags(self.prompts[self.record_by_name[name]])))
+            self._tags_by_name[name] = tags
+        return tags
+
+    def _tag_index(self):
+        if self._records_by_tag is None:
+            index = {}
+            for idx, prompt in enumerate(self.prompts):
+                for tag in self._split_tags(prompt):
+                    index.setdefault(tag.lower(), set()).add(idx)
+            self._records_by_tag = index
+        return self._records_by_tag
+
+    def _set_prompt(self, idx, prompt):
+        """Store a new prompt for row ``idx`` and keep the per-row caches in step.
+
+        Returns False (and touches nothing) when the prompt is unchanged.
+        """
+        old_prompt = self.prompts[idx]
+        if prompt == old_prompt:
+            return False
+        self.prompts[idx] = prompt
+        # Split the new prompt once and refresh the cached entry with it rather
+        # than dropping it for _record_tags to re-split on the next selection.
+        new_tags = tuple(self._dedupe_tags(self._split_tags(prompt)))
+        name = self.file_names[idx]
+        if self.record_by_name.get(name) == idx:
+            self._tags_by_name[name] = new_tags
+        index = self._records_by_tag
+        if index is not None:
+            for tag in self._split_tags(old_prompt):
+                rows = index.get(tag.lower())
+                if rows is not None:
+                    rows.discard(idx)
+            for tag in new_tags:
+                index.setdefault(tag.lower(), set()).add(idx)
+        return True
 
     def _refresh_current_tags(self):
-        tags = []
+        # A full recount from selected_files supersedes any flips still queued.
+        self._selection_timer.stop()
+        self._selection_delta.clear()
+        self._current_tag_counts = Counter()
+        self._current_tag_spelling = {}
+        if not self.selected_files:
+            self.current_tags_list.clear()
+            return
         for name in self.selected_files:
-            rec = self.record_by_name.get(name)
-            if not rec:
-                continue
-            tags.extend(self._split_tags(rec.get("prompt", "")))
-        tags = sorted(self._dedupe_tags(tags), key=str.lower)
-        self.current_tags_list.clear()
-        for tag in tags:
-            self.current_tags_list.addItem(tag)
-
-    def _refresh_pending_lists(self):
-        self.new_tags_list.clear()
-        for tag in self.pending_new_tags:
-            self.new_tags_list.addItem(tag)
-
-        self.added_tags_list.clear()
-        for tag in self.pending_add_tags:
-            self.added_tags_list.addItem(tag)
+            if name in self.record_by_name:
+                self._count_selected_tags(name, 1)
+        self._show_current_tags()
+
+    def _count_selected_tags(self, name, delta):
+        """Add (delta=1) or remove (delta=-1) one file's tags from the selection counts.
+
+        Returns True when some tag appeared in or dropped out of the selection.
+        """
+        counts = self._current_tag_counts
+        spelling = self._current_tag_spelling
+        crossed = False
+        for tag in self._record_tags(name):
+            key = tag.lower()
+            n = counts[key] + delta
+            if n > 0:
+                counts[key] = n
+                if n == 1 and delta == 1:
+                    spelling[key] = tag
+                    crossed = True
+            else:
+                counts.pop(key, None)
+                spelling.pop(key, None)
+                crossed = True
+        return crossed
+
+    def _show_current_tags(self):
+        self._fill_list(self.current_tags_list, sorted(self._current_tag_spelling.values(), key=str.lower))
+
+    def _refresh_queued_tags_lists(self):
+        self._fill_list(self.new_tags_list, self.pending_new_tags)
+        self._fill_list(self.added_tags_list, self.pending_add_tags)
+        self._fill_list(
+            self.edited_tags_list,
+            [f"{old_tag} -> {new_tag}" for old_tag, new_tag in self.pending_edits.values()],
+        )
 
-        self.edited_tags_list.clear()
-        for old_key, (old_tag, new_tag) in self.pending_edits.items():
-            self.edited_tags_list.addItem(f"{old_tag} -> {new_tag}")
+    def _refresh_selected_images_list(self):
+        self._fill_list(self.selected_images_list, self.selected_files)
 
-        self.selected_images_list.clear()
-        for name in self.selected_files:
-            self.selected_images_list.addItem(name)
+    def _on_image_selection_changed(self, selected, deselected):
+        delta = self._selection_delta
+        for index in deselected.indexes():
+            delta[index.data()] -= 1
+        for index in selected.indexes():
+            delta[index.data()] += 1
+        self._selection_timer.start()
 
-    def _on_image_selection_changed(self):
-        selected = [i.text() for i in self.image_list.selectedItems()]
-        self.selected_files = selected
-        self._refresh_current_tags()
-        self._refresh_pending_lists()
+    def _flush_selection_change(self):
+        self._selection_timer.stop()
+        if not self._selection_delta:
+            return
+        delta, self._selection_delta = self._selection_delta, Counter()
+        self.selected_files = self._selected_strings(self.image_list)
+        # Only the files whose selection flipped are counted in or out; the
+        # current-tags list is rebuilt only if that changed which tags it shows.
+        crossed = False
+        for name, n in delta.items():
+            if n < 0:
+                crossed |= self._count_selected_tags(name, -1)
+        for name, n in delta.items():
+            if n > 0:
+                crossed |= self._count_selected_tags(name, 1)
+        if crossed:
+            self._show_current_tags()
+        self._request_refresh("selected")
 
     def set_selected_images(self, image_paths):
         names = [os.path.basename(p) for p in image_paths if p]
         self.selected_files = [n for n in names if n in self.record_by_name]
-        self.image_list.blockSignals(True)
-        for i in range(self.image_list.count()):
-            item = self.image_list.item(i)
-            item.setSelected(item.text() in self.selected_files)
-        self.image_list.blockSignals(False)
-        self._refresh_current_tags()
-        self._refresh_pending_lists()
+        rows = sorted({self._image_rows[n] for n in self.selected_files})
+        model = self._image_model
+        # One range per run of consecutive wanted rows, applied in a single select call.
+        ranges = QItemSelection()
+        start = end = None
+        for row in rows:
+            if start is not None and row == end + 1:
+                end = row
+                continue
+            if start is not None:
+                ranges.select(model.index(start), model.index(end))
+            start = end = row
+        if start is not None:
+            ranges.select(model.index(start), model.index(end))
+        selection = self.image_list.selectionModel()
+        selection.blockSignals(True)
+        try:
+            selection.select(ranges, QItemSelectionModel.ClearAndSelect)
+        finally:
+            selection.blockSignals(False)
+        self.image_list.viewport().update()
+        with self._batch():
+            self._request_refresh("current")
+            self._request_refresh("selected")
 
     def _queue_new_tag(self):
         tag = self.new_tag_input.text().strip()
@@ -511,7 +933,7 @@ class TagTab(QWidget):
         if tag not in self.pending_new_tags:
             self.pending_new_tags.append(tag)
         self.new_tag_input.clear()
-        self._refresh_pending_lists()
+        self._request_refresh("queued")
 
     def _save_new_tags(self):
         if not self.pending_new_tags:
@@ -519,83 +941,98 @@ class TagTab(QWidget):
             return
         for tag in self.pending_new_tags:
             self.custom_tags.add(tag)
+        self._custom_tags_sorted = sorted(self.custom_tags)
         self.pending_new_tags = []
         self._save_custom_tags()
-        self._refresh_tag_lists()
+        with self._batch():
+            self._request_refresh("tags")
 
     def _queue_add_tags(self):
-        selected = [i.text() for i in self.add_tag_list.selectedItems()]
+        selected = self._selected_strings(self.add_tag_list)
         if not selected:
             return
         for tag in selected:
             if tag not in self.pending_add_tags:
                 self.pending_add_tags.append(tag)
-        self._refresh_pending_lists()
+        self._request_refresh("queued")
 
     def _clear_added_tags(self):
         self.pending_add_tags = []
-        self._refresh_pending_lists()
+        self._request_refresh("queued")
 
     def _queue_edit_tag(self):
-        selected_items = self.edit_tag_list.selectedItems()
-        if not selected_items:
+        selected = self._selected_strings(self.edit_tag_list)
+        if not selected:
             return
-        old_tag = selected_items[0].text()
+        old_tag = selected[0]
         new_tag = self.edit_tag_input.text().strip()
         if not new_tag:
             return
         self.pending_edits[old_tag.lower()] = (old_tag, new_tag)
         self.edit_tag_input.clear()
-        self._refresh_pending_lists()
+        self._request_refresh("queued")
 
     def _apply_tag_edits(self):
         if not self.pending_edits:
             QMessageBox.information(self, "No Edits", "Queue tag edits before saving.")
             return
-        for rec in self.records:
-            prompt = rec.get("prompt", "")
-            tags = self._split_tags(prompt)
-            updated = []
-            for tag in tags:
-                key = tag.lower()
-                if key in self.pending_edits:
-                    updated.append(self.pending_edits[key][1])
-                else:
-                    updated.append(tag)
-            rec["prompt"] = ", ".join(self._dedupe_tags(updated))
-
-        updated_custom = set()
-        for tag in self.custom_tags:
-            key = tag.lower()
-            if key in self.pending_edits:
-                updated_custom.add(self.pending_edits[key][1])
-            else:
-                updated_custom.add(tag)
+        # Only rows that carry one of the renamed tags can change.
+        index = self._tag_index()
+        rows = set()
+        hit_keys = []
+        for key in self.pending_edits:
+            key_rows = index.get(key)
+            if key_rows:
+                rows.update(key_rows)
+                hit_keys.append(key)
+        # Lowercase old tag -> new tag, so each tag is one dict lookup.
+        renames = {key: edit[1] for key, edit in self.pending_edits.items()}
+        changed = False
+        for idx in sorted(rows):
+            updated = [renames.get(t.lower(), t) for t in self._split_tags(self.prompts[idx])]
+            if self._set_prompt(idx, ", ".join(self._dedupe_tags(updated))):
+                changed = True
+        if changed:
+            # Every spelling of a renamed key was replaced, so the old keys go
+            # and the new tags come in; see _merge_into_tag_map for the rest.
+            if self._record_tag_map is not None:
+                for key in hit_keys:
+                    self._record_tag_map.pop(key, None)
+            self._merge_into_tag_map(renames[key] for key in hit_keys)
+
+        updated_custom = {renames.get(t.lower(), t) for t in self.custom_tags}
         self.custom_tags = updated_custom
+        self._custom_tags_sorted = sorted(updated_custom)
 
-        self._save_records()
+        # records.csv is only rewritten when some prompt actually changed;
+        # renaming a tag that lives only in the custom list just saves that list.
+        if changed:
+            self._save_records()
         self._save_custom_tags()
         self.pending_edits = {}
-        self.records, self.fieldnames = self._load_records()
-        self.record_by_name = {r.get("file_name"): r for r in self.records if r.get("file_name")}
-        self._refresh_tag_lists()
+        with self._batch():
+            self._request_refresh("tags")
 
     def _apply_tags_to_selected(self):
+        self._flush_selection_change()
         if not self.selected_files or not self.pending_add_tags:
             QMessageBox.information(self, "Nothing to Apply", "Select images and queue tags to apply.")
             return
         selected_set = set(self.selected_files)
-        for rec in self.records:
-            if rec.get("file_name") not in selected_set:
+        touched = False
+        for idx, name in enumerate(self.file_names):
+            if name not in selected_set:
                 continue
-            tags = self._split_tags(rec.get("prompt", ""))
+            tags = self._split_tags(self.prompts[idx])
             tags.extend(self.pending_add_tags)
-            rec["prompt"] = ", ".join(self._dedupe_tags(tags))
-        self._save_records()
+            if self._set_prompt(idx, ", ".join(self._dedupe_tags(tags))):
+                touched = True
+        if touched:
+            self._merge_into_tag_map(self.pending_add_tags)
+            self._save_records()
         self.pending_add_tags = []
-        self.records, self.fieldnames = self._load_records()
-        self.record_by_name = {r.get("file_name"): r for r in self.records if r.get("file_name")}
-        self._refresh_tag_lists()
+        with self._batch():
+            self._request_refresh("tags")
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -4,7 +4,8 @@ import os
 import shutil
 import subprocess
 import sys
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
@@ -22,13 +23,29 @@ from PySide6.QtWidgets import (
 )
 
 from simage.utils.paths import resolve_repo_path
-from .csv_edit import amend_records_csv
+from .csv_edit import CSV_IO_BUFFER, amend_records_csv, replace_csv
 from .record_filter import load_records
 from .scanner import IMG_EXTS
 from .thumbnails import THUMB_DIR, ensure_thumbnail, thumbnail_path_for_source
 from .theme import UI_OUTER_PADDING, UI_SECTION_GAP  # DIFF-001-001
 
 
+def _copy_file(pair: Tuple[str, str]) -> bool:
+    try:
+        shutil.copy2(*pair)
+    except Exception:
+        return False
+    return True
+
+
+def _ensure_thumbnails(paths: List[str]) -> None:
+    # Pillow releases the GIL while decoding and resizing, so threads scale here.
+    if not paths:
+        return
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+        list(pool.map(lambda p: ensure_thumbnail(p, THUMB_DIR), paths))
+
+
 class BatchTab(QWidget):
     def __init__(self, parent=None, gallery=None) -> None:
         super().__init__(parent)
@@ -157,6 +174,14 @@ class BatchTab(QWidget):
         QMessageBox.warning(self, "No Selection", "Select images in the Gallery tab first.")
         return False
 
+    def _records_by_name(self) -> Dict[str, dict]:
+        records = self.gallery.all_records if self.gallery else load_records(self.csv_path)
+        # First record wins for a repeated file name, as a linear scan would.
+        index: Dict[str, dict] = {}
+        for rec in records:
+            index.setdefault(rec.get("file_name"), rec)
+        return index
+
     def _reload_gallery(self) -> None:
         if self.gallery and hasattr(self.gallery, "reload_records"):
             self.gallery.reload_records()
@@ -169,11 +194,11 @@ class BatchTab(QWidget):
             QMessageBox.warning(self, "No Tags", "Enter one or more tags.")
             return
 
-        records = self.gallery.all_records if self.gallery else load_records(self.csv_path)
+        records_by_name = self._records_by_name()
         updates = []
         for img_path in self.selected_images:
             fname = os.path.basename(img_path)
-            rec = next((r for r in records if r.get("file_name") == fname), None)
+            rec = records_by_name.get(fname)
             if rec:
                 prompt = rec.get("prompt", "")
                 prompt_tags = {t.strip() for t in str(prompt).split(",") if t.strip()}
@@ -185,28 +210,27 @@ class BatchTab(QWidget):
     def _update_csv_for_renames(self, rename_map: Dict[str, str]) -> None:
         if not rename_map or not os.path.exists(self.csv_path):
             return
-        backup_path = self.csv_path + ".bak"
-        if not os.path.exists(backup_path):
-            os.replace(self.csv_path, backup_path)
-        else:
-            os.remove(self.csv_path)
-            os.replace(backup_path, self.csv_path)
-            os.replace(self.csv_path, backup_path)
-        with open(backup_path, "r", encoding="utf-8", newline="") as f:
-            reader = list(csv.DictReader(f))
-            fieldnames = reader[0].keys() if reader else []
-        for row in reader:
-            old_name = row.get("file_name")
-            if old_name in rename_map:
-                new_name = rename_map[old_name]
-                row["file_name"] = new_name
-                src = row.get("source_file", "")
-                if src:
-                    row["source_file"] = os.path.join(os.path.dirname(src), new_name)
-        with open(self.csv_path, "w", encoding="utf-8", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
+        # Stream the rows into a temp file; replace_csv backs up and swaps it in
+        # after the source is closed (Windows cannot replace an open file).
+        with replace_csv(self.csv_path) as out_f, open(
+            self.csv_path, "r", encoding="utf-8", newline="", buffering=CSV_IO_BUFFER
+        ) as src_f:
+            reader = csv.reader(src_f)
+            writer = csv.writer(out_f)
+            header = next(reader, [])
+            writer.writerow(header)
+            # Positional rows: no per-row dict, only the two renamed columns are touched.
+            fn_idx = header.index("file_name") if "file_name" in header else None
+            src_idx = header.index("source_file") if "source_file" in header else None
             for row in reader:
+                if not row:
+                    continue
+                if fn_idx is not None and fn_idx < len(row):
+                    new_name = rename_map.get(row[fn_idx])
+                    if new_name is not None:
+                        row[fn_idx] = new_name
+                        if src_idx is not None and src_idx < len(row) and row[src_idx]:
+                            row[src_idx] = os.path.join(os.path.dirname(row[src_idx]), new_name)
                 writer.writerow(row)
 
     def apply_batch_rename(self) -> None:
@@ -219,6 +243,7 @@ class BatchTab(QWidget):
 
         rename_map: Dict[str, str] = {}
         new_paths = []
+        moved = []
         for i, img_path in enumerate(self.selected_images):
             fname = os.path.basename(img_path)
             ext = os.path.splitext(fname)[1]
@@ -232,9 +257,10 @@ class BatchTab(QWidget):
                         os.remove(old_thumb)
                     except Exception:
                         pass
-                ensure_thumbnail(new_path, THUMB_DIR)
+                moved.append(new_path)
             rename_map[fname] = new_name
             new_paths.append(new_path)
+        _ensure_thumbnails(moved)
 
         self._update_csv_for_renames(rename_map)
         self.set_selected_images(new_paths)
@@ -250,6 +276,7 @@ class BatchTab(QWidget):
 
         os.makedirs(target, exist_ok=True)
         new_paths = []
+        moved = []
         for img_path in self.selected_images:
             fname = os.path.basename(img_path)
             new_path = os.path.join(target, fname)
@@ -261,8 +288,9 @@ class BatchTab(QWidget):
                         os.remove(old_thumb)
                     except Exception:
                         pass
-                ensure_thumbnail(new_path, THUMB_DIR)
+                moved.append(new_path)
             new_paths.append(new_path)
+        _ensure_thumbnails(moved)
 
         self.set_selected_images(new_paths)
         self._reload_gallery()
@@ -272,17 +300,17 @@ class BatchTab(QWidget):
             return
         export_dir = "exported_images"
         os.makedirs(export_dir, exist_ok=True)
-        records = self.gallery.all_records if self.gallery else load_records(self.csv_path)
+        records_by_name = self._records_by_name()
         for img_path in self.selected_images:
             fname = os.path.basename(img_path)
             target_img = os.path.join(export_dir, fname)
             shutil.copy2(img_path, target_img)
-            rec = next((r for r in records if r.get("file_name") == fname), None)
+            rec = records_by_name.get(fname)
             if rec:
                 meta_path = os.path.join(export_dir, f"{os.path.splitext(fname)[0]}.json")
                 with open(meta_path, "w", encoding="utf-8") as f:
                     json.dump(rec, f, indent=2, ensure_ascii=False)
-            ensure_thumbnail(img_path, THUMB_DIR)
+        _ensure_thumbnails(self.selected_images)
 
         QMessageBox.information(self, "Export Complete", f"Exported {len(self.selected_images)} image(s).")
 
@@ -293,8 +321,14 @@ class BatchTab(QWidget):
         input_dir = resolve_repo_path("Input", must_exist=False, allow_absolute=False)
         os.makedirs(input_dir, exist_ok=True)
 
-        imported = 0
-        skipped = 0
+        # Destinations are picked up front against one listing of Input/ plus
+        # the names claimed earlier in this import, then copied on a thread pool.
+        # Names are compared casefolded: Windows and default macOS volumes treat
+        # "A.png" and "a.png" as the same file, and os.path.normcase does not
+        # fold on macOS.
+        with os.scandir(input_dir) as entries:
+            taken = {e.name.casefold() for e in entries}
+        pairs: List[Tuple[str, str]] = []
         for root, _dirs, files in os.walk(folder):
             for name in files:
                 ext = os.path.splitext(name)[1].lower()
@@ -302,20 +336,18 @@ class BatchTab(QWidget):
                     continue
                 src = os.path.join(root, name)
                 base, ext = os.path.splitext(name)
-                dest = os.path.join(input_dir, name)
-                if os.path.exists(dest):
-                    i = 1
-                    while True:
-                        candidate = os.path.join(input_dir, f"{base}_{i}{ext}")
-                        if not os.path.exists(candidate):
-                            dest = candidate
-                            break
-                        i += 1
-                try:
-                    shutil.copy2(src, dest)
-                    imported += 1
-                except Exception:
-                    skipped += 1
+                dest_name = name
+                i = 1
+                while dest_name.casefold() in taken:
+                    dest_name = f"{base}_{i}{ext}"
+                    i += 1
+                taken.add(dest_name.casefold())
+                pairs.append((src, os.path.join(input_dir, dest_name)))
+
+        # Disk-bound work, so threads overlap the copies despite the GIL.
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 4)) as pool:
+            imported = sum(pool.map(_copy_file, pairs))
+        skipped = len(pairs) - imported
 
         QMessageBox.information(
             self,
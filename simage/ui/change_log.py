@@ -1,30 +1,86 @@
 import os
-import json
+
+from simage.utils import jsonio
 
 class ChangeLogger:
     """
     Logs unsaved changes to a file for recovery after crash or improper close.
+
+    The log is JSON Lines, one change per line, so logging a change appends a
+    single line instead of rewriting everything logged so far.
     """
-    LOG_PATH = os.path.join(os.path.dirname(__file__), "unsaved_changes.log")
+    LOG_PATH = os.path.join(os.path.dirname(__file__), "unsaved_changes.jsonl")
+    # Changes read from or written to LOG_PATH so far, and the path they belong to.
+    _cache = None
+    _cache_path = None
+    # True when the log ends in a torn line that the next append must not extend.
+    _torn_tail = False
+
+    @staticmethod
+    def _changes() -> list:
+        if ChangeLogger._cache is None or ChangeLogger._cache_path != ChangeLogger.LOG_PATH:
+            ChangeLogger._migrate_legacy_log()
+            ChangeLogger._cache, ChangeLogger._torn_tail = ChangeLogger._read_log(ChangeLogger.LOG_PATH)
+            ChangeLogger._cache_path = ChangeLogger.LOG_PATH
+        return ChangeLogger._cache
+
+    @staticmethod
+    def _migrate_legacy_log() -> None:
+        """
+        Convert the old single-JSON-array log (unsaved_changes.log next to
+        LOG_PATH) to JSON Lines once, so changes logged before the switch are
+        still recovered. Left in place if it cannot be parsed.
+        """
+        legacy_path = os.path.splitext(ChangeLogger.LOG_PATH)[0] + ".log"
+        if legacy_path == ChangeLogger.LOG_PATH or os.path.exists(ChangeLogger.LOG_PATH):
+            return
+        try:
+            with open(legacy_path, "rb") as f:
+                changes = jsonio.loads(f.read())
+        except (OSError, ValueError):
+            return
+        if not isinstance(changes, list):
+            return
+        with open(ChangeLogger.LOG_PATH, "wb") as f:
+            for change in changes:
+                if isinstance(change, dict):
+                    f.write(jsonio.dumps_line(change))
+        os.remove(legacy_path)
+
+    @staticmethod
+    def _read_log(path: str):
+        changes = []
+        line = b"\n"
+        try:
+            with open(path, "rb", buffering=1 << 20) as f:
+                for line in f:
+                    try:
+                        change = jsonio.loads(line)
+                    except ValueError:
+                        # Blank, corrupt, or torn by a crash mid-write.
+                        continue
+                    if isinstance(change, dict):
+                        changes.append(change)
+        except OSError:
+            return [], False
+        return changes, not line.endswith(b"\n")
 
     @staticmethod
     def log_change(change: dict):
-        changes = ChangeLogger.load_changes()
-        changes.append(change)
-        with open(ChangeLogger.LOG_PATH, "w", encoding="utf-8") as f:
-            json.dump(changes, f)
+        ChangeLogger._changes().append(change)
+        lead = b"\n" if ChangeLogger._torn_tail else b""
+        with open(ChangeLogger.LOG_PATH, "ab") as f:
+            f.write(lead + jsonio.dumps_line(change))
+        ChangeLogger._torn_tail = False
 
     @staticmethod
     def load_changes():
-        if not os.path.exists(ChangeLogger.LOG_PATH):
-            return []
-        try:
-            with open(ChangeLogger.LOG_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return []
+        return list(ChangeLogger._changes())
 
     @staticmethod
     def clear():
         if os.path.exists(ChangeLogger.LOG_PATH):
             os.remove(ChangeLogger.LOG_PATH)
+        ChangeLogger._cache = []
+        ChangeLogger._cache_path = ChangeLogger.LOG_PATH
+        ChangeLogger._torn_tail = False
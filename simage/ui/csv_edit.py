@@ -1,20 +1,47 @@
+import contextlib
 import csv
 import os
-from typing import List, Dict, Any
+import shutil
+import tempfile
+from typing import Any, Dict, Iterator, List, TextIO
+
+# Buffer size for records.csv rewrites; large reads/writes mean far fewer syscalls.
+CSV_IO_BUFFER = 1 << 20
+
+@contextlib.contextmanager
+def replace_csv(csv_path: str) -> Iterator[TextIO]:
+    """
+    Yield a text file for the new contents of csv_path.
+
+    When the block finishes, the current file is copied to csv_path + ".bak" and the
+    new one is swapped in with a single os.replace, so csv_path is never missing.
+    The temp file has a unique name, so concurrent writers cannot clobber each
+    other's output; if the block raises, it is removed and csv_path is untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(csv_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(csv_path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="", buffering=CSV_IO_BUFFER) as f:
+            yield f
+        if os.path.exists(csv_path):
+            # mkstemp creates the file owner-only; keep the original's mode.
+            shutil.copymode(csv_path, tmp_path)
+            shutil.copy2(csv_path, csv_path + ".bak")
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, csv_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
 
 def amend_records_csv(csv_path: str, updates: List[Dict[str, Any]], key_field: str = "file_name") -> None:
     """
     Amend records.csv in place: update rows matching key_field with new data from updates.
     Backup the original file before writing.
     """
-    backup_path = csv_path + ".bak"
-    if not os.path.exists(backup_path):
-        os.replace(csv_path, backup_path)
-    else:
-        os.remove(csv_path)
-        os.replace(backup_path, csv_path)
-        os.replace(csv_path, backup_path)
-    with open(backup_path, "r", encoding="utf-8", newline="") as f:
+    with open(csv_path, "r", encoding="utf-8", newline="", buffering=CSV_IO_BUFFER) as f:
         reader = list(csv.DictReader(f))
         fieldnames = reader[0].keys() if reader else []
     # Build update map
@@ -29,7 +56,7 @@ def amend_records_csv(csv_path: str, updates: List[Dict[str, Any]], key_field: s
     for k, u in update_map.items():
         if not any(row[key_field] == k for row in new_rows):
             new_rows.append(u)
-    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+    with replace_csv(csv_path) as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         for row in new_rows:
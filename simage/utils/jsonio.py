@@ -0,0 +1,60 @@
+"""
+JSON encode/decode that uses orjson when it is installed.
+
+Results do not depend on whether orjson is present: output is compact UTF-8,
+and NaN/Infinity (which ComfyUI sometimes emits) round-trip as the stdlib
+writes them instead of orjson's null.
+"""
+from __future__ import annotations
+
+import json
+import math
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON text or UTF-8 bytes."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            pass  # NaN/Infinity are rejected by orjson but accepted by json
+    return json.loads(data)
+
+
+def _has_nonfinite(v: Any) -> bool:
+    if isinstance(v, float):
+        return not math.isfinite(v)
+    if isinstance(v, dict):
+        return any(_has_nonfinite(x) for x in v.values())
+    if isinstance(v, (list, tuple)):
+        return any(_has_nonfinite(x) for x in v)
+    return False
+
+
+def dumps(v: Any, *, indent: bool = False) -> bytes:
+    """Serialize to compact (or 2-space indented) UTF-8 JSON."""
+    if orjson is not None:
+        try:
+            out = orjson.dumps(v, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            pass  # non-str keys or ints beyond 64 bits
+        else:
+            # orjson writes NaN/Infinity as null; only then is the value scanned.
+            if b"null" not in out or not _has_nonfinite(v):
+                return out
+    if indent:
+        text = json.dumps(v, ensure_ascii=False, indent=2)
+    else:
+        text = json.dumps(v, ensure_ascii=False, separators=(",", ":"))
+    return text.encode("utf-8")
+
+
+def dumps_line(v: Any) -> bytes:
+    """``dumps`` plus the trailing newline of a JSON Lines record."""
+    return dumps(v) + b"\n"
@@ -28,3 +28,39 @@ def test_change_logger_handles_corrupt(tmp_path):
         assert ChangeLogger.load_changes() == []
     finally:
         ChangeLogger.LOG_PATH = orig_log
+
+def test_change_logger_appends_one_line_per_change(tmp_path):
+    orig_log = ChangeLogger.LOG_PATH
+    try:
+        ChangeLogger.LOG_PATH = os.fspath(tmp_path / "unsaved_changes.jsonl")
+        ChangeLogger.log_change({"img": "a.png"})
+        ChangeLogger.log_change({"img": "b.png"})
+        with open(ChangeLogger.LOG_PATH, "a", encoding="utf-8") as f:
+            f.write('{"img": "c.p')  # torn write from a crash
+        lines = open(ChangeLogger.LOG_PATH, encoding="utf-8").read().splitlines()
+        assert len(lines) == 3
+        # A fresh read skips the torn line and keeps the complete ones.
+        ChangeLogger._cache = None
+        assert [c["img"] for c in ChangeLogger.load_changes()] == ["a.png", "b.png"]
+        # The next change starts on its own line instead of extending the torn one.
+        ChangeLogger.log_change({"img": "d.png"})
+        ChangeLogger._cache = None
+        assert [c["img"] for c in ChangeLogger.load_changes()] == ["a.png", "b.png", "d.png"]
+    finally:
+        ChangeLogger.LOG_PATH = orig_log
+
+
+def test_change_logger_migrates_legacy_log(tmp_path):
+    orig_log = ChangeLogger.LOG_PATH
+    try:
+        ChangeLogger.LOG_PATH = os.fspath(tmp_path / "unsaved_changes.jsonl")
+        legacy = tmp_path / "unsaved_changes.log"
+        legacy.write_text('[{"img": "old1.png"}, {"img": "old2.png"}]', encoding="utf-8")
+        ChangeLogger._cache = None
+        assert [c["img"] for c in ChangeLogger.load_changes()] == ["old1.png", "old2.png"]
+        assert not legacy.exists()
+        ChangeLogger.log_change({"img": "new.png"})
+        ChangeLogger._cache = None
+        assert [c["img"] for c in ChangeLogger.load_changes()] == ["old1.png", "old2.png", "new.png"]
+    finally:
+        ChangeLogger.LOG_PATH = orig_log
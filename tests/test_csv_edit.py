@@ -1,4 +1,6 @@
-from simage.ui.csv_edit import amend_records_csv
+import pytest
+
+from simage.ui.csv_edit import amend_records_csv, replace_csv
 
 
 def test_amend_records_csv_updates_and_adds(tmp_path):
@@ -20,3 +22,21 @@ def test_amend_records_csv_updates_and_adds(tmp_path):
     updated = csv_path.read_text(encoding="utf-8")
     assert "img1.png,new" in updated
     assert "img3.png,added" in updated
+
+
+def test_replace_csv_backs_up_and_swaps_in_one_step(tmp_path):
+    csv_path = tmp_path / "records.csv"
+    csv_path.write_text("file_name\nold.png\n", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        with replace_csv(str(csv_path)) as f:
+            f.write("file_name\nhalf")
+            raise RuntimeError("writer failed")
+    assert csv_path.read_text(encoding="utf-8") == "file_name\nold.png\n"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["records.csv"]
+
+    with replace_csv(str(csv_path)) as f:
+        f.write("file_name\nnew.png\n")
+    assert csv_path.read_text(encoding="utf-8") == "file_name\nnew.png\n"
+    assert (tmp_path / "records.csv.bak").read_text(encoding="utf-8") == "file_name\nold.png\n"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["records.csv", "records.csv.bak"]
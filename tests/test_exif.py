@@ -66,3 +66,38 @@ def test_main_writes_empty_jsonl_when_no_input(tmp_path: Path, monkeypatch: pyte
     assert rc == 0
     assert out_jsonl.exists()
     assert out_jsonl.read_text(encoding="utf-8") == ""
+
+
+def _append_sources(tmp_path: Path, out_jsonl: Path, *paths: Path) -> int:
+    temp_json = tmp_path / "exiftool.json"
+    temp_json.write_text(json.dumps([{"SourceFile": str(p)} for p in paths]), encoding="utf-8")
+    return exif.append_new_jsonl(temp_json, out_jsonl)
+
+
+def test_append_new_jsonl_keeps_copies_under_new_paths(tmp_path: Path) -> None:
+    first = tmp_path / "a" / "img.png"
+    copy = tmp_path / "b" / "img.png"
+    for path in (first, copy):
+        path.parent.mkdir()
+        path.write_bytes(b"same bytes")
+    out_jsonl = tmp_path / "out.jsonl"
+
+    assert _append_sources(tmp_path, out_jsonl, first) == 1
+    assert _append_sources(tmp_path, out_jsonl, first) == 0
+    assert _append_sources(tmp_path, out_jsonl, copy) == 1
+    assert len(out_jsonl.read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_append_new_jsonl_records_rename_within_input(tmp_path: Path) -> None:
+    old = tmp_path / "Input" / "img.png"
+    new = tmp_path / "Input" / "renamed_1.png"
+    old.parent.mkdir()
+    old.write_bytes(b"same bytes")
+    out_jsonl = tmp_path / "out.jsonl"
+
+    assert _append_sources(tmp_path, out_jsonl, old) == 1
+    old.rename(new)
+    assert _append_sources(tmp_path, out_jsonl, new) == 1
+    sources = [json.loads(line)["SourceFile"] for line in out_jsonl.read_text(encoding="utf-8").splitlines()]
+    assert sources == [str(old), str(new)]
+
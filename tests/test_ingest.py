@@ -29,10 +29,21 @@ from simage.core.ingest import (
     normalize_key,
     record_key,
     init_db,
+    connect_db,
     upsert_record,
+    upsert_records,
     load_jsonl,
+    load_jsonl_lines,
+    write_jsonl,
     write_csv,
+    load_csv_records,
     normalize_record,
+    normalize_records,
+    prehash_paths,
+    read_exif_jsonl,
+    stat_paths,
+    cached_digests,
+    load_file_fingerprints,
     merge_record_lists,
     compute_csv_columns,
 )
@@ -85,6 +96,12 @@ def test_parse_ksampler_widgets_extracts_params():
     assert out["sampler"] == "euler_cfg_pp"
     assert out["scheduler"] == "simple"
 
+def test_parse_ksampler_widgets_keeps_large_seed_exact():
+    out = parse_ksampler_widgets([18446744073709551615, "30", "6.5", "euler", "karras"])
+    assert out["seed"] == 18446744073709551615
+    assert out["steps"] == 30
+    assert out["cfg_scale"] == 6.5
+
 def test_extract_comfyui_params_from_widgets():
     workflow = {
         "nodes": [
@@ -223,6 +240,15 @@ def test_extract_keyed_fields_skips_camera_model():
     assert "model" not in out
 
 
+def test_extract_keyed_fields_numeric_coercion():
+    exif_obj = {"Seed": "12345678901234567891", "Steps": "30.0", "CFG": True, "Width": 512}
+    out = extract_keyed_fields(exif_obj)
+    assert out["seed"] == 12345678901234567891
+    assert out["steps"] == 30
+    assert out["width"] == 512
+    assert "cfg_scale" not in out
+
+
 def test_parse_a1111_parameters_extracts_fields():
     text = (
         "Prompt text. Negative prompt: bad "
@@ -307,7 +333,7 @@ def test_init_db_and_upsert_record(tmp_path: Path):
         "kv": {"steps": 20, "prompt": "cat", "meta": {"a": 1}},
     }
 
-    with sqlite3.connect(db_path) as conn:
+    with connect_db(os.fspath(db_path)) as conn:
         upsert_record(conn, rec)
         row = conn.execute("SELECT file_name FROM images WHERE id='img1'").fetchone()
         assert row[0] == "img1.png"
@@ -315,7 +341,9 @@ def test_init_db_and_upsert_record(tmp_path: Path):
         kv_map = {r[0]: r for r in kv_rows}
         assert "steps" in kv_map
         assert kv_map["steps"][2] == 20.0
-        assert kv_map["meta"][3] == '{"a": 1}'
+        assert isinstance(kv_map["meta"][3], str)
+        assert json.loads(kv_map["meta"][3]) == {"a": 1}
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
 
 
 def test_normalize_record_extracts_prompt(tmp_path: Path):
@@ -344,3 +372,184 @@ def test_normalize_record_prefers_workflow_prompt(tmp_path: Path):
     }
     rec = normalize_record(exif_obj)
     assert rec["prompt"] == "workflow prompt"
+
+
+def test_prehash_paths_matches_sha256_file(tmp_path: Path):
+    a = tmp_path / "a.bin"
+    b = tmp_path / "b.bin"
+    a.write_bytes(b"aaa")
+    b.write_bytes(b"bbb")
+    missing = os.fspath(tmp_path / "missing.bin")
+    digests = prehash_paths([os.fspath(a), os.fspath(b), os.fspath(a), missing, None])
+    assert digests == {os.fspath(a): sha256_file(os.fspath(a)), os.fspath(b): sha256_file(os.fspath(b))}
+
+    rec = normalize_record({"SourceFile": os.fspath(a)}, digests)
+    assert rec["sha256"] == digests[os.fspath(a)]
+
+
+def test_parse_a1111_parameters_keeps_first_field_and_full_values():
+    text = "cat Steps: 30, Sampler: DPM++ 2M, Steps: 99, Model hash: abc, Model: animagine xl"
+    parsed = parse_a1111_parameters(text)
+    assert parsed["steps"] == 30
+    assert parsed["sampler"] == "DPM++ 2M"
+    assert parsed["model"] == "animagine xl"
+
+
+def _init_test_db(tmp_path: Path) -> str:
+    db_path = os.fspath(tmp_path / "images.db")
+    init_db(db_path, os.fspath(REPO_ROOT / "simage" / "data" / "schema.sql"))
+    return db_path
+
+
+def _image_record(name: str = "img1", **fields):
+    rec = {
+        "id": name,
+        "source_file": f"Input/{name}.png",
+        "file_name": f"{name}.png",
+        "ext": "png",
+        "width": None,
+        "height": None,
+        "created_utc": None,
+        "imported_utc": "2020-01-01T00:00:00Z",
+        "sha256": None,
+        "format_hint": None,
+        "raw_text_preview": None,
+        "kv": {},
+    }
+    rec.update(fields)
+    return rec
+
+
+def test_upsert_records_bulk_matches_single(tmp_path: Path):
+    db_path = _init_test_db(tmp_path)
+
+    records = [
+        _image_record(
+            f"img{i}",
+            width=64,
+            height=64,
+            kv={"steps": i, "seed": "42", "prompt_tokens": [{"t": "cat"}]},
+        )
+        for i in range(3)
+    ]
+
+    with sqlite3.connect(db_path) as conn:
+        upsert_records(conn, records)
+        upsert_records(conn, records)
+        assert conn.execute("SELECT COUNT(*) FROM images").fetchone()[0] == 3
+        assert conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0] == 9
+        assert conn.execute("SELECT v_num FROM kv WHERE image_id='img2' AND k='seed'").fetchone()[0] == 42.0
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+
+def test_read_exif_jsonl_skips_blank_lines_and_bom(tmp_path: Path):
+    path = tmp_path / "exif_raw.jsonl"
+    path.write_bytes(
+        b'\xef\xbb\xbf{"SourceFile": "a.png"}\r\n'
+        b"\n"
+        b'  {"SourceFile": "b.png", "Prompt": "caf\xc3\xa9"}  \n'
+    )
+    assert read_exif_jsonl(os.fspath(path)) == [
+        {"SourceFile": "a.png"},
+        {"SourceFile": "b.png", "Prompt": "café"},
+    ]
+
+
+def test_cached_digests_reuse_unchanged_files(tmp_path: Path):
+    db_path = _init_test_db(tmp_path)
+
+    img = tmp_path / "a.png"
+    img.write_bytes(b"abc")
+    abs_path = os.fspath(img)
+    stats = stat_paths([abs_path, abs_path, os.fspath(tmp_path / "missing.png")])
+    assert list(stats) == [abs_path]
+
+    rec = _image_record(source_file="Input/a.png", file_name="a.png", sha256="cached")
+    with sqlite3.connect(db_path) as conn:
+        upsert_records(conn, [rec], {"Input/a.png": stats[abs_path]})
+        known = load_file_fingerprints(conn)
+
+    pairs = [("Input/a.png", abs_path)]
+    assert cached_digests(pairs, stats, known) == {abs_path: "cached"}
+
+    os.utime(img, ns=(stats[abs_path][1] + 10**9, stats[abs_path][1] + 10**9))
+    assert cached_digests(pairs, stat_paths([abs_path]), known) == {}
+
+
+def test_init_db_adds_fingerprint_columns_to_old_db(tmp_path: Path):
+    db_path = tmp_path / "images.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE images (id TEXT PRIMARY KEY, source_file TEXT UNIQUE, sha256 TEXT)")
+    schema_path = REPO_ROOT / "simage" / "data" / "schema.sql"
+    init_db(os.fspath(db_path), os.fspath(schema_path))
+    with sqlite3.connect(db_path) as conn:
+        cols = {row[1] for row in conn.execute("PRAGMA table_info(images)")}
+    assert {"size", "mtime_ns"} <= cols
+
+
+def test_write_jsonl_round_trips_through_load_jsonl(tmp_path: Path):
+    path = tmp_path / "records.jsonl"
+    records = [{"prompt": "café", "seed": 2**70}, {"kv": {"a": [1, 2.5, None]}}]
+    write_jsonl(os.fspath(path), records)
+    assert load_jsonl(os.fspath(path)) == records
+    assert path.read_bytes().count(b"\n") == 2
+
+
+def test_write_jsonl_keeps_nan_workflow_values(tmp_path: Path):
+    path = tmp_path / "records.jsonl"
+    write_jsonl(os.fspath(path), [{"workflow_json": {"cfg": float("nan")}}])
+    assert path.read_bytes() == b'{"workflow_json":{"cfg":NaN}}\n'
+
+
+def test_write_jsonl_passes_cached_lines_through(tmp_path: Path):
+    src = tmp_path / "old.jsonl"
+    src.write_bytes(b'{"file_name": "a.png",  "seed": 1}\n\nnot json\n')
+    lines = load_jsonl_lines(os.fspath(src))
+    assert lines == [({"file_name": "a.png", "seed": 1}, b'{"file_name": "a.png",  "seed": 1}')]
+
+    out = tmp_path / "out.jsonl"
+    write_jsonl(os.fspath(out), [{"file_name": "b.png"}, lines[0][1]])
+    assert out.read_bytes().splitlines()[1] == lines[0][1]
+    assert load_jsonl(os.fspath(out)) == [{"file_name": "b.png"}, {"file_name": "a.png", "seed": 1}]
+
+
+def test_load_csv_records_matches_dictreader(tmp_path: Path):
+    import csv
+
+    path = tmp_path / "records.csv"
+    path.write_text('file_name,prompt,seed\na.png,"cat, dog",1\n\nb.png\n', encoding="utf-8")
+    with open(path, "r", encoding="utf-8") as f:
+        expected = list(csv.DictReader(f))
+    assert load_csv_records(os.fspath(path)) == expected
+    assert expected[1] == {"file_name": "b.png", "prompt": None, "seed": None}
+
+
+def test_normalize_records_parallel_matches_serial(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    objs = [
+        {
+            "SourceFile": f"Input/img{i}.png",
+            "PNG:Parameters": f"cat {i}\nNegative prompt: blurry\nSteps: 20, Seed: {i}",
+        }
+        for i in range(6)
+    ]
+    digests = {"unused": "x"}
+    serial = normalize_records(objs, digests)
+    parallel = normalize_records(objs, digests, parallel_min=1)
+
+    def strip(rs):
+        return [{k: v for k, v in r.items() if k != "imported_utc"} for r in rs]
+
+    assert strip(parallel) == strip(serial)
+    assert [r["seed"] for r in parallel] == list(range(6))
+
+
+def test_upsert_record_replaces_stale_kv_rows(tmp_path: Path):
+    db_path = _init_test_db(tmp_path)
+
+    rec = _image_record(kv={"prompt": "cat", "prompt_tokens": [{"t": "cat"}]})
+    with connect_db(db_path) as conn:
+        upsert_record(conn, rec)
+        upsert_record(conn, dict(rec, kv={"prompt": "dog"}))
+        rows = conn.execute("SELECT k, v FROM kv WHERE image_id='img1'").fetchall()
+    assert rows == [("prompt", "dog")]
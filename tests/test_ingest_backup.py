@@ -1,8 +1,17 @@
 import os
-from simage.core.ingest import sha256_file_backup
+from simage.core.ingest import HASH_CHUNK_SIZE, sha256_file_backup
 
 def test_sha256_file_backup(tmp_path):
     tmp_file = tmp_path / "hash.bin"
     tmp_file.write_bytes(b"testdata")
     hash_val = sha256_file_backup(os.fspath(tmp_file))
     assert isinstance(hash_val, str)
+
+
+def test_sha256_file_backup_matches_hashlib(tmp_path):
+    import hashlib
+
+    tmp_file = tmp_path / "big.bin"
+    data = b"x" * (2 * HASH_CHUNK_SIZE + 17)
+    tmp_file.write_bytes(data)
+    assert sha256_file_backup(os.fspath(tmp_file)) == hashlib.sha256(data).hexdigest()
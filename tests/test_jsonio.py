@@ -0,0 +1,30 @@
+import math
+
+import pytest
+
+from simage.utils import jsonio
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(jsonio, "orjson", None)
+    elif jsonio.orjson is None:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+def test_dumps_is_compact_utf8(backend) -> None:
+    assert jsonio.dumps({"a": [1, "é"], "b": None}) == '{"a":[1,"é"],"b":null}'.encode("utf-8")
+    assert jsonio.dumps_line({"a": 1}) == b'{"a":1}\n'
+
+
+def test_dumps_keeps_nan_and_infinity(backend) -> None:
+    out = jsonio.dumps({"cfg": float("nan"), "w": [float("inf")], "x": None})
+    assert out == b'{"cfg":NaN,"w":[Infinity],"x":null}'
+    back = jsonio.loads(out)
+    assert math.isnan(back["cfg"]) and back["w"] == [math.inf] and back["x"] is None
+
+
+def test_dumps_falls_back_for_non_str_keys(backend) -> None:
+    assert jsonio.loads(jsonio.dumps({1: "a"})) == {"1": "a"}